@@ -0,0 +1,217 @@
+from engine.pieces import (
+    PAWN,
+    LANCE,
+    KNIGHT,
+    SILVER,
+    GOLD,
+    BISHOP,
+    ROOK,
+    KING,
+    PROMOTED,
+)
+
+# Square (row, col) of the 9x9 board is bit `row * 9 + col` of an 81-bit
+# Python int. Row 0 is the top of the board, where white pieces start.
+SIZE = 9
+N_SQUARES = SIZE * SIZE
+FULL = (1 << N_SQUARES) - 1
+BIT = tuple(1 << sq for sq in range(N_SQUARES))
+
+ORTHOGONAL = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+GOLD_STEPS = ((1, 0), (1, 1), (1, -1), (0, 1), (0, -1), (-1, 0))
+
+# Single step offsets and sliding directions of every piece code, given (like
+# the move lists in `engine.pieces`) from white's point of view.
+STEPS = {
+    PAWN: ((1, 0),),
+    LANCE: (),
+    KNIGHT: ((2, 1), (2, -1)),
+    SILVER: ((1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)),
+    GOLD: GOLD_STEPS,
+    BISHOP: (),
+    ROOK: (),
+    KING: ORTHOGONAL + DIAGONAL,
+    PAWN | PROMOTED: GOLD_STEPS,
+    LANCE | PROMOTED: GOLD_STEPS,
+    KNIGHT | PROMOTED: GOLD_STEPS,
+    SILVER | PROMOTED: GOLD_STEPS,
+    BISHOP | PROMOTED: ORTHOGONAL,
+    ROOK | PROMOTED: DIAGONAL,
+}
+
+SLIDES = {
+    LANCE: ((1, 0),),
+    BISHOP: DIAGONAL,
+    ROOK: ORTHOGONAL,
+    BISHOP | PROMOTED: DIAGONAL,
+    ROOK | PROMOTED: ORTHOGONAL,
+}
+N_CODES = 16
+
+
+def square(row, col):
+    return row * SIZE + col
+
+
+def coords(sq):
+    return divmod(sq, SIZE)
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+
+def squares(bb):
+    """Yields indices of the set bits of `bb` from the lowest one."""
+
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def popcount(bb):
+    return bb.bit_count()
+
+
+# RANKS[row] and FILES[col] - all squares of a row or a column
+RANKS = tuple(sum(BIT[row * SIZE + col] for col in range(SIZE)) for row in range(SIZE))
+FILES = tuple(sum(BIT[row * SIZE + col] for row in range(SIZE)) for col in range(SIZE))
+
+# PROMOTION_ZONE[color] - the three furthest ranks from the color's side
+PROMOTION_ZONE = (RANKS[0] | RANKS[1] | RANKS[2], RANKS[6] | RANKS[7] | RANKS[8])
+
+
+def _inbounds(row, col):
+    return 0 <= row < SIZE and 0 <= col < SIZE
+
+
+def _step_attacks(color, code, sq):
+    row, col = coords(sq)
+    sign = 1 if color else -1
+    bb = 0
+    for drow, dcol in STEPS.get(code, ()):
+        r, c = row + sign * drow, col + sign * dcol
+        if _inbounds(r, c):
+            bb |= BIT[square(r, c)]
+    return bb
+
+
+def _ray(direction, sq):
+    drow, dcol = direction
+    row, col = coords(sq)
+    bb = 0
+    row, col = row + drow, col + dcol
+    while _inbounds(row, col):
+        bb |= BIT[square(row, col)]
+        row, col = row + drow, col + dcol
+    return bb
+
+
+# Directions are indexed so that the first four increase the square index
+# (first blocker is the lowest bit of the ray) and the last four decrease it
+# (first blocker is the highest bit).
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1))
+DIRECTION = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+# STEP_ATTACKS[color][code][sq] - non-sliding part of the attacks of a piece
+STEP_ATTACKS = tuple(
+    tuple(
+        tuple(_step_attacks(color, code, sq) for sq in range(N_SQUARES))
+        for code in range(N_CODES)
+    )
+    for color in (0, 1)
+)
+
+# RAYS[direction][sq] - all squares from `sq` (exclusive) to the edge
+RAYS = tuple(
+    tuple(_ray(direction, sq) for sq in range(N_SQUARES)) for direction in DIRECTIONS
+)
+
+# SLIDE_DIRECTIONS[color][code] - indices of rays a piece slides along
+SLIDE_DIRECTIONS = tuple(
+    tuple(
+        tuple(
+            DIRECTION[(drow, dcol) if color else (-drow, -dcol)]
+            for drow, dcol in SLIDES.get(code, ())
+        )
+        for code in range(N_CODES)
+    )
+    for color in (0, 1)
+)
+
+
+def _between(sq1, sq2):
+    (row1, col1), (row2, col2) = coords(sq1), coords(sq2)
+    row_diff, col_diff = row2 - row1, col2 - col1
+    if sq1 == sq2 or not (
+        row_diff == 0 or col_diff == 0 or abs(row_diff) == abs(col_diff)
+    ):
+        return 0
+    step = ((row_diff > 0) - (row_diff < 0), (col_diff > 0) - (col_diff < 0))
+    return RAYS[DIRECTION[step]][sq1] & ~RAYS[DIRECTION[step]][sq2] & ~BIT[sq2]
+
+
+# BETWEEN[sq1][sq2] - squares strictly between two squares on a common line
+BETWEEN = tuple(
+    tuple(_between(sq1, sq2) for sq2 in range(N_SQUARES)) for sq1 in range(N_SQUARES)
+)
+
+
+def ray_attacks(direction, sq, occupied):
+    """Returns squares along ray `direction` from `sq` up to and including the first occupied one."""
+
+    ray = RAYS[direction][sq]
+    blockers = ray & occupied
+    if blockers:
+        if direction < 4:
+            first = (blockers & -blockers).bit_length() - 1
+        else:
+            first = blockers.bit_length() - 1
+        ray ^= RAYS[direction][first]
+    return ray
+
+
+def lance_attacks(color, sq, occupied):
+    return ray_attacks(0 if color else 4, sq, occupied)
+
+
+def rook_attacks(sq, occupied):
+    return (
+        ray_attacks(0, sq, occupied)
+        | ray_attacks(1, sq, occupied)
+        | ray_attacks(4, sq, occupied)
+        | ray_attacks(5, sq, occupied)
+    )
+
+
+def bishop_attacks(sq, occupied):
+    return (
+        ray_attacks(2, sq, occupied)
+        | ray_attacks(3, sq, occupied)
+        | ray_attacks(6, sq, occupied)
+        | ray_attacks(7, sq, occupied)
+    )
+
+
+def attacks(color, code, sq, occupied):
+    """Returns bitboard of squares attacked by a piece.
+
+    Args:
+        color (int): color value of the piece
+
+        code (int): piece code
+
+        sq (int): square the piece stands on
+
+        occupied (int): bitboard of all occupied squares, sliding pieces stop at the first one
+
+    Returns:
+        int: bitboard of attacked squares
+    """
+
+    bb = STEP_ATTACKS[color][code][sq]
+    for direction in SLIDE_DIRECTIONS[color][code]:
+        bb |= ray_attacks(direction, sq, occupied)
+    return bb
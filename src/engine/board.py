@@ -1,520 +1,485 @@
-import time
-import engine.pieces as pieces
-
-from engine.bot import Bot
-from engine.pieces import COLOR
-
-
-class Clock:
-    def __init__(self, max_time) -> None:
-        self.current_task = None
-        self.timers = {}
-        self.reftime = time.monotonic()
-        self.max_time = max_time
-
-    def elapsed(self, reset=False):
-        old_reftime = self.reftime
-        new_reftime = time.monotonic()
-        if reset:
-            self.reftime = new_reftime
-
-        return new_reftime - old_reftime
-
-    def switch_to(self, newtask):
-        task = self.current_task
-        elapsed = self.elapsed(True)
-        if task is not None:
-            self.timers[task] -= elapsed
-
-        self.current_task = newtask
-        if newtask is not None and newtask not in self.timers:
-            self.timers[newtask] = self.max_time
-
-    def get_time(self, task):
-        if task not in self.timers:
-            return self.max_time
-
-        val = self.timers[task]
-        if task == self.current_task:
-            val -= self.elapsed()
-
-        return int(max(0, val))
-
-    def pretty_time(self, task):
-        return time.strftime("%H:%M:%S", time.gmtime(self.get_time(task)))
-
-
-class Board:
-    def __init__(self, size=9, max_time=600, is_pvp=True, who_starts=COLOR.BLACK):
-        """Initializes `Board` object.
-
-        Args:
-            size (int, optional): size of the board i.e. board will be a grid with size x size squares. Defaults to 9.
-
-            max_time (int, optional): max time of game in seconds. Defaults to 600.
-
-            is_pvp (bool, optional): Defaults to True.
-
-            who_starts (_type_, optional): Defaults to COLOR.BLACK.
-        """
-
-        self.size = size
-        self.grid = [[None for _ in range(size)] for _ in range(size)]
-        self.clock = Clock(max_time)
-
-        # first black, second white
-        self.active = ({}, {})
-        self.captured = ({}, {})
-        self.kings = [None, None]
-
-        self.bot = Bot(self, 3, 4)
-        self.turn_color = who_starts
-        self.is_pvp = is_pvp
-
-        self.__setup()
-
-    def __setup(self):
-        """Places pieces on the board. Note that white pieces are placed at the top."""
-
-        # Set first ranks
-        for row in (0, self.size - 1):
-            color = COLOR.WHITE if row == 0 else COLOR.BLACK
-
-            lance_l = pieces.Lance(pos=(row, 0), color=color)
-            knight_l = pieces.Knight(pos=(row, 1), color=color)
-            silver_l = pieces.Silver(pos=(row, 2), color=color)
-            gold_l = pieces.Gold(pos=(row, 3), color=color)
-            king = pieces.King(pos=(row, 4), color=color)
-            gold_r = pieces.Gold(pos=(row, 5), color=color)
-            silver_r = pieces.Silver(pos=(row, 6), color=color)
-            knight_r = pieces.Knight(pos=(row, 7), color=color)
-            lance_r = pieces.Lance(pos=(row, 8), color=color)
-
-            self.grid[row][0] = lance_l
-            self.grid[row][1] = knight_l
-            self.grid[row][2] = silver_l
-            self.grid[row][3] = gold_l
-            self.grid[row][4] = king
-            self.grid[row][5] = gold_r
-            self.grid[row][6] = silver_r
-            self.grid[row][7] = knight_r
-            self.grid[row][8] = lance_r
-
-            self.active[color.value]["L1" + str(color.value)] = lance_l
-            self.active[color.value]["L2" + str(color.value)] = lance_r
-            self.active[color.value]["N1" + str(color.value)] = knight_l
-            self.active[color.value]["N2" + str(color.value)] = knight_r
-            self.active[color.value]["S1" + str(color.value)] = silver_l
-            self.active[color.value]["S2" + str(color.value)] = silver_r
-            self.active[color.value]["G1" + str(color.value)] = gold_l
-            self.active[color.value]["G2" + str(color.value)] = gold_r
-            self.active[color.value]["K" + str(color.value)] = king
-
-            self.kings[color.value] = king
-
-        # Set second ranks
-        for row in (1, self.size - 2):
-            color = COLOR.WHITE if row == 1 else COLOR.BLACK
-
-            bishop = pieces.Bishop(
-                pos=(row, 1 if color == COLOR.BLACK else 7), color=color
-            )
-            rook = pieces.Rook(pos=(row, 7 if color == COLOR.BLACK else 1), color=color)
-
-            self.grid[row][bishop.col] = bishop
-            self.grid[row][rook.col] = rook
-
-            self.active[color.value]["B" + str(color.value)] = bishop
-            self.active[color.value]["R" + str(color.value)] = rook
-
-        # Set third ranks
-        for row in (2, self.size - 3):
-            color = COLOR.WHITE if row == 2 else COLOR.BLACK
-
-            for col in range(self.size):
-                piece = pieces.Pawn(pos=(row, col), color=color)
-                self.grid[row][col] = piece
-                self.active[color.value]["P{}".format(col) + str(color.value)] = piece
-
-    def __get_path(self, pos1, pos2) -> list:
-        """Returns diagonal, horizontal or vertical path if such exists between two squares at
-        positions `pos1` and `pos2`.
-
-        Args:
-            pos1 (int, int): position of first square
-
-            pos2 (int, int): position of second square
-
-        Returns:
-            list: list of squares forming a path betwwen pos1 and pos2
-        """
-
-        row_diff = pos2[0] - pos1[0]
-        col_diff = pos2[1] - pos1[1]
-        path = []
-
-        if abs(row_diff) == abs(col_diff):  # Path is diagonal
-            row_step = 1 if row_diff > 0 else -1
-            col_step = 1 if col_diff > 0 else -1
-            for i in range(1, abs(row_diff)):
-                path.append((pos1[0] + i * row_step, pos1[1] + i * col_step))
-            return path
-
-        elif row_diff == 0:  # Path is horizontal
-            path = []
-            col_step = 1 if col_diff > 0 else -1
-            for i in range(1, abs(col_diff)):
-                path.append((pos1[0], pos1[1] + i * col_step))
-            return path
-
-        elif col_diff == 0:  # Path is vertical
-            path = []
-            row_step = 1 if row_diff > 0 else -1
-            for i in range(1, abs(row_diff)):
-                path.append((pos1[0] + i * row_step, pos1[1]))
-            return path
-
-        return path
-
-    def __is_blocked(self, pos, piece: pieces.Piece) -> bool:
-        """Checks whether `piece` has a line of sight to square at position `pos`.
-
-        Args:
-            pos (int, int): position of a square
-
-            piece (pieces.Piece): piece
-
-        Returns:
-            bool: True if is blocked else False
-        """
-
-        path = self.__get_path((piece.row, piece.col), pos)
-
-        for row, col in path:
-            if self.grid[row][col] is not None:
-                return True
-
-        return False
-
-    def get_available(self, piece: pieces.Piece, is_bot=False) -> set:
-        """Returns available squares to which `piece` can move. Getting moves of opposite color is inevitable for checking opposite moves in bot
-
-        Args:
-            piece (pieces.Piece): piece
-
-            is_bot (bool, optional): Defaults to False.
-
-        Returns:
-            set: set of available moves
-        """
-
-        if piece.color != self.turn_color and not is_bot:
-            return set()
-
-        inbounds = lambda row, col: 0 <= row < self.size and 0 <= col < self.size
-        available_pos = set()
-
-        for move in piece.moves:
-            if piece.color == COLOR.WHITE:
-                row, col = piece.row + move[0], piece.col + move[1]
-            else:
-                row, col = piece.row - move[0], piece.col - move[1]
-
-            if (
-                inbounds(row, col)
-                and not self.__is_blocked((row, col), piece)
-                and (
-                    self.grid[row][col] is None
-                    or self.grid[row][col].color != piece.color
-                )
-            ):
-                available_pos.add((row, col))
-
-        return available_pos
-
-    def get_attacking(self, pos: tuple[int, int], attacking_color: COLOR) -> list:
-        """Returns set of all `attacking_color` pieces which attack square at pos `position`
-
-        Args:
-
-            pos (tuple[int, int]): position of square
-
-            attacking_color (COLOR): color of attacking pieces
-
-        Returns:
-            list:
-        """
-
-        attack_pieces = []
-
-        for attack_piece in self.active[attacking_color.value].values():
-            positions = set()
-
-            for move in attack_piece.moves:
-                if attack_piece.color == COLOR.WHITE:
-                    row, col = attack_piece.row + move[0], attack_piece.col + move[1]
-                else:
-                    row, col = attack_piece.row - move[0], attack_piece.col - move[1]
-
-                if row != attack_piece.row or col != attack_piece.col:
-                    positions.add((row, col))
-
-            if pos in positions and not self.__is_blocked(pos, attack_piece):
-                attack_pieces.append(attack_piece)
-
-        return attack_pieces
-
-    def move(self, piece: pieces.Piece, new_position: tuple[int, int]) -> None:
-        """Moves piece to new position i.e. changes its internal position `(piece.x, piece.y)` and
-        changes piece's position on the board stored in structures `self.grid` and `self.active`.
-
-        Args:
-            piece (pieces.Piece): piece
-
-            new_position (tuple[int, int]): a pair of integers specifying new position
-        """
-
-        if (
-            self.grid[new_position[0]][new_position[1]] is not None
-            and self.grid[new_position[0]][new_position[1]].color
-            == piece.color.opposite()
-        ):
-            self.capture(self.grid[new_position[0]][new_position[1]])
-
-        self.grid[piece.row][piece.col] = None
-        self.grid[new_position[0]][new_position[1]] = piece
-        piece.place(new_position)
-
-    def capture(self, captured_piece: pieces.Piece):
-        """Deletes piece `captured_piece` from board (i.e. from structures `Board.grid` and
-        `Board.active`) and adds it to structure `Board.captured`.
-
-        Args:
-            captured_piece (pieces.Piece): piece
-        """
-
-        capture_key = None
-        for key, piece in self.active[captured_piece.color.value].items():
-            if piece == captured_piece:
-                capture_key = key
-
-        color = captured_piece.color
-        self.captured[color.opposite().value][capture_key] = captured_piece
-        captured_piece.degrade()
-        captured_piece.row = None
-        captured_piece.col = None
-
-        del self.active[color.value][capture_key]
-
-    def end_turn(self):
-        self.clock.switch_to(self.turn_color.opposite())
-        self.turn_color = self.turn_color.opposite()
-
-    def revert_move(
-        self,
-        piece: pieces.Piece,
-        captured: pieces.Piece,
-        old_position: tuple[int, int],
-        was_promoted: bool,
-    ):
-        if captured is not None:
-            if captured.color == piece.color:
-                raise ValueError
-            if was_promoted:
-                captured.promote()
-            captured.place(piece.pos())
-            captured_key = None
-            for key, val in self.captured[piece.color.value].items():
-                if val is captured:
-                    captured_key = key
-            self.active[piece.color.opposite().value][captured_key] = captured
-            del self.captured[piece.color.value][captured_key]
-            captured.color = piece.color.opposite()
-        self.grid[piece.row][piece.col] = captured
-        self.grid[old_position[0]][old_position[1]] = piece
-        piece.place(old_position)
-
-    def revert_drop(self, piece: pieces.Piece) -> None:
-        x, y = piece.pos()
-        self.grid[x][y] = None
-        undrop_key = None
-        for key, val in self.active[piece.color.value].items():
-            if val is piece:
-                undrop_key = key
-        self.captured[piece.color.value][undrop_key] = piece
-        del self.active[piece.color.value][undrop_key]
-        piece.color = piece.color.opposite()
-
-    def drop(self, piece: pieces.Piece, new_position) -> None:
-        """Drops piece to new position i.e. changes its internal position `(piece.x, piece.y)` and
-        changes piece's position on the board stored in structures `self.grid` and `self.active`.
-
-        Args:
-            piece (pieces.Piece): _description_
-            new_position (_type_): _description_
-
-        Raises:
-            ValueError: _description_
-        """
-        piece.degrade()
-        piece.place(new_position)
-        piece.color = piece.color.opposite()
-        if self.grid[new_position[0]][new_position[1]] is not None:
-            print(self.grid[new_position[0]][new_position[1]])
-            raise ValueError
-        drop_key = None
-        for key, val in self.captured[piece.color.value].items():
-            if val is piece:
-                drop_key = key
-        self.active[piece.color.value][drop_key] = self.captured[piece.color.value][
-            drop_key
-        ]
-        del self.captured[piece.color.value][drop_key]
-        self.grid[new_position[0]][new_position[1]] = piece
-
-    def get_available_drops(self, piece, is_bot=False):
-        """returns all free positions on which player or bot can drop their piece on"""
-        color = piece.color.opposite()
-        if color != self.turn_color and not is_bot:
-            return set()
-        free = set()
-        possible_rows = {i for i in range(9)}
-        if color == COLOR.BLACK:
-            match piece.name:
-                case "P" | "L":
-                    possible_rows = {i for i in range(1, 9)}
-                case "N":
-                    possible_rows = {i for i in range(2, 9)}
-        else:
-            match piece.name:
-                case "P" | "L":
-                    possible_rows = {i for i in range(8)}
-                case "N":
-                    possible_rows = {i for i in range(7)}
-        possible_cols = set(i for i in range(9))
-        impossible_cols = set()
-        if piece.name == "P":
-            for val in self.active[color.value].values():
-                if val.name == "P":
-                    impossible_cols.add(val.col)
-        possible_cols.difference_update(impossible_cols)
-        king_x, king_y = self.kings[color.opposite().value].pos()
-        for x in possible_rows:
-            for y in possible_cols:
-                if self.grid[x][y] is None and not (
-                    king_x == x + color.value * 2 - 1 and king_y == y
-                ):
-                    free.add((x, y))
-        return free
-
-    def is_checkmate(self, color):
-        king = self.kings[color.value]
-
-        attackers = self.get_attacking((king.row, king.col), king.color.opposite())
-
-        # Check if king was captured
-        if "K" + str(color.value) in self.captured[color.opposite().value]:
-            return True
-
-        # Check if the king is attacked
-        if len(attackers) == 0:
-            return False
-
-        # Check if the king can escape or capture the attacking piece
-        for pos in self.get_available(king):
-            attack_pieces = []
-
-            for piece_type in self.active[color.opposite().value].keys():
-                attack_piece = self.active[color.opposite().value][piece_type]
-                positions = set()
-
-                for move in attack_piece.moves:
-                    if attack_piece.color == COLOR.WHITE:
-                        row, col = (
-                            attack_piece.row + move[0],
-                            attack_piece.col + move[1],
-                        )
-                    else:
-                        row, col = (
-                            attack_piece.row - move[0],
-                            attack_piece.col - move[1],
-                        )
-
-                    if row != attack_piece.row or col != attack_piece.col:
-                        positions.add((row, col))
-                king_is_blocked = False
-                path = self.__get_path(attack_piece.pos(), pos)
-
-                for row, col in path:
-                    if (
-                        self.grid[row][col] is not None
-                        and self.grid[row][col] is not king
-                    ):
-                        king_is_blocked = True
-                        break
-                if pos in positions and not king_is_blocked:
-                    attack_pieces.append(attack_piece)
-            if len(attack_pieces) == 0:
-                return False
-
-        # Check if any piece can block the attack
-        if len(attackers) == 1:
-            attacker = attackers[0]
-            path = set(
-                self.__get_path((king.row, king.col), (attacker.row, attacker.col))
-            )
-
-            for piece_type in self.active[king.color.value].keys():
-                defender = self.active[king.color.value][piece_type]
-
-                for move in self.get_available(defender):
-                    if move in path:
-                        return False
-
-        # Check if any piece can capture the attacking piece
-        if len(attackers) == 1:
-            attacker = attackers[0]
-            defenders = set(
-                self.get_attacking((attacker.row, attacker.col), king.color)
-            ) - {king}
-
-            if len(defenders) > 0:
-                return False
-
-        return True
-
-    def is_check(self, color: pieces.COLOR):
-        king = self.kings[color.value]
-        attackers = self.get_attacking(king.pos(), color.opposite())
-        return len(attackers) > 0
-
-    def show(self):
-        import os
-        import platform
-
-        if platform.system() == "Windows":
-            os.system("cls")
-        else:
-            os.system("clear")
-
-        print("   ", end="")
-        for col in range(self.size):
-            print(col, " ", end="")
-        print()
-
-        for row in range(self.size):
-            print(row, " ", end="")
-            for col in range(self.size):
-                if self.grid[row][col] is not None:
-                    if self.grid[row][col].color == COLOR.BLACK:
-                        print(
-                            "\033[91m{}\033[0m".format(self.grid[row][col].name),
-                            " ",
-                            end="",
-                        )
-                    else:
-                        print("\033[0m{}".format(self.grid[row][col].name), " ", end="")
-                else:
-                    print("·", " ", end="")
-            print()
-        print("\n")
+import time
+import engine.pieces as pieces
+
+from engine.bitboard import coords, square, squares
+from engine.bot import Bot
+from engine.core import N_KINDS
+from engine.moves import (
+    DROP,
+    drop_kind,
+    from_square,
+    is_drop,
+    is_promotion,
+    make_drop,
+    make_move,
+    to_square,
+)
+from engine.pieces import COLOR
+from engine.position import Position
+from engine.sfen import START_SFEN, parse_sfen, to_sfen
+
+# a position occurring this many times ends the game (sennichite)
+REPETITIONS = 4
+
+
+class Clock:
+    def __init__(self, max_time, increment=0, byoyomi=0) -> None:
+        """Initializes chess clock.
+
+        Args:
+            max_time (int): main time of each side in seconds
+
+            increment (int, optional): seconds added to a side's main time after each of its moves. Defaults to 0.
+
+            byoyomi (int, optional): seconds each move may take once the main time is used up. Defaults to 0.
+        """
+
+        self.current_task = None
+        self.timers = {}
+        self.reftime = time.monotonic()
+        self.max_time = max_time
+        self.increment = increment
+        self.byoyomi = byoyomi
+
+    def elapsed(self, reset=False):
+        old_reftime = self.reftime
+        new_reftime = time.monotonic()
+        if reset:
+            self.reftime = new_reftime
+
+        return new_reftime - old_reftime
+
+    def switch_to(self, newtask):
+        task = self.current_task
+        elapsed = self.elapsed(True)
+        if task is not None:
+            self.timers[task] -= elapsed
+            # a move finished within byoyomi keeps the period for the next one
+            if -self.byoyomi <= self.timers[task] < 0:
+                self.timers[task] = 0
+            if self.timers[task] >= 0:
+                self.timers[task] += self.increment
+
+        self.current_task = newtask
+        if newtask is not None and newtask not in self.timers:
+            self.timers[newtask] = self.max_time
+
+    def get_time(self, task):
+        if task not in self.timers:
+            return self.max_time
+
+        val = self.timers[task]
+        if task == self.current_task:
+            val -= self.elapsed()
+
+        return int(max(0, val + self.byoyomi))
+
+    def pretty_time(self, task):
+        return time.strftime("%H:%M:%S", time.gmtime(self.get_time(task)))
+
+
+class Board:
+    def __init__(
+        self,
+        size=9,
+        max_time=600,
+        is_pvp=True,
+        who_starts=COLOR.BLACK,
+        increment=0,
+        byoyomi=0,
+        sfen=None,
+        position=None,
+    ):
+        """Initializes `Board` object.
+
+        Args:
+            size (int, optional): size of the board i.e. board will be a grid with size x size squares. Defaults to 9.
+
+            max_time (int, optional): max time of game in seconds. Defaults to 600.
+
+            is_pvp (bool, optional): Defaults to True.
+
+            who_starts (_type_, optional): Defaults to COLOR.BLACK.
+
+            increment (int, optional): seconds added to the clock after each move. Defaults to 0.
+
+            byoyomi (int, optional): seconds per move once main time is used up. Defaults to 0.
+
+            sfen (str, optional): position to start from, its side to move overrides
+            `who_starts`. Defaults to the start position.
+
+            position (Position, optional): snapshot to start from instead of `sfen`.
+        """
+
+        self.size = size
+        self.grid = [[None for _ in range(size)] for _ in range(size)]
+        self.clock = Clock(max_time, increment, byoyomi)
+
+        # compact copy of the position which move generation runs against, pieces
+        # in hand are only kept there as counts (see `Board.hand`)
+        self.core = None
+        # move number of the position the board was set up with
+        self.first_ply = 1
+
+        # answers of `is_checkmate` by position hash
+        self.mate_cache = {}
+
+        if position is not None:
+            self.__setup(position.to_core())
+        else:
+            self.__setup(parse_sfen(sfen if sfen is not None else START_SFEN))
+            if sfen is None:
+                self.core.set_side(who_starts.value)
+            else:
+                fields = sfen.split()
+                self.first_ply = int(fields[3]) if len(fields) > 3 else 1
+
+        # built on first use, see `Board.bot`
+        self.__bot = None
+        self.turn_color = COLOR(self.core.side)
+        self.is_pvp = is_pvp
+
+    @property
+    def bot(self):
+        """Bot playing on this board, created on first use so that boards of PvP games and
+        throwaway ones don't pay for it."""
+
+        if self.__bot is None:
+            self.__bot = Bot(self)
+        return self.__bot
+
+    @classmethod
+    def from_sfen(cls, text, **kwargs):
+        """Returns a board set up with the position given in SFEN, its side to move starts.
+
+        Args:
+            text (str): position, e.g. `engine.sfen.START_SFEN`
+
+            **kwargs: other arguments of `Board`
+
+        Raises:
+            ValueError: `text` is not a valid SFEN
+        """
+
+        return cls(sfen=text, **kwargs)
+
+    @classmethod
+    def from_snapshot(cls, position, **kwargs):
+        """Returns a board set up with `position` taken with `Board.snapshot`, its side to
+        move starts.
+
+        Args:
+            position (Position): snapshot
+
+            **kwargs: other arguments of `Board`
+        """
+
+        return cls(position=position, **kwargs)
+
+    def snapshot(self):
+        """Returns an immutable `Position` of the current position, e.g. to send it to
+        another process."""
+
+        return Position.from_core(self.core)
+
+    def to_sfen(self):
+        """Returns the current position in SFEN, numbered after the moves played on the board."""
+
+        return to_sfen(self.core, self.first_ply + len(self.core.stack))
+
+    def __setup(self, core):
+        """Places pieces of the position held by `core`. Note that white pieces are placed
+        at the top."""
+
+        self.core = core
+
+        board = self.core.squares
+        for sq in squares(self.core.occupied[0] | self.core.occupied[1]):
+            row, col = coords(sq)
+            self.grid[row][col] = pieces.Piece(
+                board[sq] & 15, COLOR(board[sq] >> 4), (row, col)
+            )
+
+    def hand(self, color: COLOR) -> tuple:
+        """Returns counts of pieces in hand of `color` indexed by kind, e.g. `hand(color)[PAWN]`."""
+
+        start = color.value * N_KINDS
+        return tuple(self.core.hands[start : start + N_KINDS])
+
+    def hand_piece(self, color: COLOR, kind: int):
+        """Returns a new piece of `kind` from the hand of `color` to be dropped with
+        `Board.drop`, None if `color` has none in hand."""
+
+        if not self.core.hands[color.value * N_KINDS + kind]:
+            return None
+        return pieces.Piece(kind, color)
+
+    def get_available(self, piece: pieces.Piece, is_bot=False) -> set:
+        """Returns available squares to which `piece` can move. Getting moves of opposite color is inevitable for checking opposite moves in bot
+
+        Args:
+            piece (pieces.Piece): piece
+
+            is_bot (bool, optional): Defaults to False.
+
+        Returns:
+            set: set of available moves
+        """
+
+        if piece.color != self.turn_color and not is_bot:
+            return set()
+
+        frm = square(piece.row, piece.col)
+        if piece.color.value == self.core.side:
+            return {
+                coords(to_square(move))
+                for move in self.core.legal_moves()
+                if from_square(move) == frm
+            }
+
+        targets = self.core.attacks_from(frm)
+        targets &= ~self.core.occupied[piece.color.value]
+
+        return {coords(sq) for sq in squares(targets)}
+
+    def get_attacking(self, pos: tuple[int, int], attacking_color: COLOR) -> list:
+        """Returns set of all `attacking_color` pieces which attack square at pos `position`
+
+        Args:
+
+            pos (tuple[int, int]): position of square
+
+            attacking_color (COLOR): color of attacking pieces
+
+        Returns:
+            list:
+        """
+
+        attackers = self.core.attackers(square(*pos), attacking_color.value)
+
+        return [self.grid[row][col] for row, col in map(coords, squares(attackers))]
+
+    def move(
+        self, piece: pieces.Piece, new_position: tuple[int, int], promote=False
+    ) -> None:
+        """Moves piece to new position i.e. changes its internal position `(piece.x, piece.y)` and
+        changes piece's position on the board stored in `self.grid`.
+
+        Args:
+            piece (pieces.Piece): piece
+
+            new_position (tuple[int, int]): a pair of integers specifying new position
+
+            promote (bool, optional): whether the piece promotes with this move. Defaults to False.
+        """
+
+        self.core.make(
+            make_move(square(piece.row, piece.col), square(*new_position), promote)
+        )
+
+        captured = self.grid[new_position[0]][new_position[1]]
+        if captured is not None and captured.color == piece.color.opposite():
+            # the core counts it in hand from now on
+            captured.degrade()
+            captured.place((None, None))
+
+        self.grid[piece.row][piece.col] = None
+        self.grid[new_position[0]][new_position[1]] = piece
+        piece.place(new_position)
+        if promote:
+            piece.promote()
+
+    def end_turn(self):
+        self.clock.switch_to(self.turn_color.opposite())
+        self.turn_color = self.turn_color.opposite()
+
+    def revert_move(
+        self,
+        piece: pieces.Piece,
+        captured: pieces.Piece,
+        old_position: tuple[int, int],
+        was_promoted: bool,
+        promoted=False,
+    ):
+        """Takes back a move made with `Board.move`.
+
+        Args:
+            piece (pieces.Piece): piece which moved
+
+            captured (pieces.Piece): piece captured by the move or None
+
+            old_position (tuple[int, int]): position the piece moved from
+
+            was_promoted (bool): whether the captured piece was promoted
+
+            promoted (bool, optional): whether the piece promoted with the move. Defaults to False.
+        """
+
+        self.core.unmake()
+        if captured is not None:
+            if captured.color == piece.color:
+                raise ValueError
+            if was_promoted:
+                captured.promote()
+            captured.place(piece.pos())
+        self.grid[piece.row][piece.col] = captured
+        self.grid[old_position[0]][old_position[1]] = piece
+        piece.place(old_position)
+        if promoted:
+            piece.degrade()
+
+    def revert_drop(self, piece: pieces.Piece) -> None:
+        x, y = piece.pos()
+        self.grid[x][y] = None
+        self.core.unmake()
+        piece.place((None, None))
+
+    def drop(self, piece: pieces.Piece, new_position) -> None:
+        """Drops piece from the hand of its color to new position, see `Board.hand_piece`.
+
+        Args:
+            piece (pieces.Piece): piece in hand
+
+            new_position (tuple[int, int]): a pair of integers specifying new position
+
+        Raises:
+            ValueError: the square is occupied or the piece is not in hand
+        """
+
+        if self.grid[new_position[0]][new_position[1]] is not None:
+            raise ValueError(f"square {new_position} is occupied")
+        if not self.core.hands[piece.color.value * N_KINDS + piece.kind]:
+            raise ValueError(f"no {piece.name} in hand")
+        piece.degrade()
+        piece.place(new_position)
+        self.grid[new_position[0]][new_position[1]] = piece
+        self.core.make(make_drop(piece.kind, square(*new_position)))
+
+    @property
+    def hash(self):
+        """Zobrist hash of the position, including pieces in hand and side to move."""
+
+        return self.core.hash
+
+    def make(self, move):
+        """Makes compact `move` (see `engine.moves`) on the position core only. Pieces in
+        `grid` are left as they are, so this is meant for searches which take the move
+        back with `Board.unmake`.
+
+        Args:
+            move (int): move
+        """
+
+        self.core.make(move)
+
+    def unmake(self):
+        """Takes back the last move made with `Board.make`."""
+
+        self.core.unmake()
+
+    def play(self, move):
+        """Plays compact `move`, e.g. one found by the bot, through `Board.move` or
+        `Board.drop`, so that pieces in `grid` follow it.
+
+        Args:
+            move (int): move
+        """
+
+        new_position = coords(to_square(move))
+        if is_drop(move):
+            piece = self.hand_piece(COLOR(self.core.side), drop_kind(move))
+            self.drop(piece, new_position)
+        else:
+            row, col = coords(from_square(move))
+            self.move(self.grid[row][col], new_position, is_promotion(move))
+
+    def get_available_drops(self, piece, is_bot=False):
+        """returns all free positions on which player or bot can drop their piece on"""
+        color = piece.color
+        if color != self.turn_color and not is_bot:
+            return set()
+
+        if color.value == self.core.side:
+            drop = DROP + piece.kind
+            return {
+                coords(to_square(move))
+                for move in self.core.legal_moves()
+                if from_square(move) == drop
+            }
+
+        targets = self.core.drop_targets(color.value, piece.kind)
+
+        return {coords(sq) for sq in squares(targets)}
+
+    def is_checkmate(self, color):
+        """Returns whether `color` has no legal move left, which loses the game.
+
+        Answers are cached by position hash, so repeated queries of a position are free.
+        """
+
+        core = self.core
+        if core.king_square(color.value) is None:
+            return True
+
+        side = core.side
+        core.set_side(color.value)
+        key = core.hash
+        if key not in self.mate_cache:
+            self.mate_cache[key] = not core.has_legal_move()
+        core.set_side(side)
+        return self.mate_cache[key]
+
+    def is_sennichite(self):
+        """Returns whether the current position occurred for the fourth time, which ends
+        the game as a draw unless one side checked perpetually (see `Board.perpetual_checker`).
+        """
+
+        return self.core.repetitions() >= REPETITIONS - 1
+
+    def perpetual_checker(self):
+        """Returns the color which gave check with every move since the current position
+        last occurred and so loses a sennichite, None if it is a draw."""
+
+        color = self.core.perpetual_check()
+        return None if color is None else COLOR(color)
+
+    def see(self, move):
+        """Returns material in hundredths which `move` (see `engine.moves`) wins once all
+        exchanges on its destination square are played out, e.g. negative if a capture
+        loses the capturing piece for less."""
+
+        return self.core.see(move)
+
+    def is_check(self, color: pieces.COLOR):
+        return self.core.in_check(color.value)
+
+    def show(self):
+        import os
+        import platform
+
+        if platform.system() == "Windows":
+            os.system("cls")
+        else:
+            os.system("clear")
+
+        print("   ", end="")
+        for col in range(self.size):
+            print(col, " ", end="")
+        print()
+
+        for row in range(self.size):
+            print(row, " ", end="")
+            for col in range(self.size):
+                if self.grid[row][col] is not None:
+                    if self.grid[row][col].color == COLOR.BLACK:
+                        print(
+                            "\033[91m{}\033[0m".format(self.grid[row][col].name),
+                            " ",
+                            end="",
+                        )
+                    else:
+                        print("\033[0m{}".format(self.grid[row][col].name), " ", end="")
+                else:
+                    print("·", " ", end="")
+            print()
+        print("\n")
@@ -0,0 +1,109 @@
+import numpy as np
+import random
+
+from collections import Counter
+from config.defs import SRC_DIR
+from engine.moves import from_usi
+
+BOOK_PATH = SRC_DIR + "/resources/bot/book.npy"
+
+# A book is an array of records sorted by position hash. The hashes come from
+# `engine.zobrist`, whose keys are fixed, so a book stays valid across runs.
+RECORD = np.dtype([("key", np.uint64), ("move", np.uint32), ("weight", np.uint32)])
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        """Initializes opening book stored at `path`.
+
+        The file is memory-mapped on the first lookup, so creating a book costs nothing.
+        A missing file makes an empty book.
+        """
+
+        self.path = path
+        self.records = None
+
+    def __load(self):
+        try:
+            self.records = np.load(self.path, mmap_mode="r")
+        except FileNotFoundError:
+            self.records = np.zeros(0, dtype=RECORD)
+        self.keys = self.records["key"]
+
+    def moves(self, key):
+        """Returns list of (move, weight) pairs stored for position with hash `key`."""
+
+        if self.records is None:
+            self.__load()
+        key = np.uint64(key)
+        start = self.keys.searchsorted(key, "left")
+        end = self.keys.searchsorted(key, "right")
+        return [
+            (int(record["move"]), int(record["weight"]))
+            for record in self.records[start:end]
+        ]
+
+    def choose(self, key, rng=random):
+        """Returns a book move for position with hash `key` picked at random in proportion
+        to the weights, or None if the position is not in the book."""
+
+        moves = self.moves(key)
+        if not moves:
+            return None
+        return rng.choices([move for move, _ in moves], [w for _, w in moves])[0]
+
+
+def read_games(path):
+    """Reads game records from a text file, one game per line as USI moves separated
+    by spaces. Empty lines and lines starting with "#" are skipped."""
+
+    games = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                games.append(line.split())
+    return games
+
+
+def build_book(games, max_ply=24):
+    """Builds an opening book from game records.
+
+    Every move played in the first `max_ply` plies of a game is counted once for the
+    position it was played in, the counts become the weights.
+
+    Args:
+        games (list): games, each a list of moves in USI notation from the start position
+
+        max_ply (int, optional): number of plies of each game to take. Defaults to 24.
+
+    Returns:
+        np.ndarray: records of the book sorted by position hash
+
+    Raises:
+        ValueError: a game contains a malformed or illegal move
+    """
+
+    from engine.board import Board
+
+    core = Board().core
+    counts = Counter()
+    for number, game in enumerate(games, 1):
+        for text in game[:max_ply]:
+            move = from_usi(text)
+            if move not in core.legal_moves():
+                raise ValueError(f"illegal move {text} in game {number}")
+            counts[core.hash, move] += 1
+            core.make(move)
+        while core.stack:
+            core.unmake()
+
+    records = np.array(
+        [(key, move, weight) for (key, move), weight in counts.items()], dtype=RECORD
+    )
+    records.sort(order=["key", "move"])
+    return records
+
+
+def save_book(records, path=BOOK_PATH):
+    np.save(path, records)
@@ -1,20 +1,33 @@
-import engine.pieces as pieces
+import multiprocessing
 import numpy as np
-import queue
+import threading
 import time
 
+from concurrent.futures import ProcessPoolExecutor, wait
+
 from config.defs import SRC_DIR
+from engine.bitboard import N_SQUARES, coords
+from engine.book import BOOK_PATH, OpeningBook
+from engine.core import EMPTY, EXCHANGE_VALUE, HAND_VALUE, N_KINDS, VALUE
+from engine.moves import PROMOTION
 from engine.pieces import COLOR
-from engine.pieces import pieces_dict
+from engine.position import Position
+from engine.tsume import TsumeSolver, king_exposed
+from engine.tt import EXACT, LOWER, UPPER, TranspositionTable
 
 MATRIX_PATH = SRC_DIR + "/resources/bot/values.npy"
 
 
-def read_matrix():
-    matrix = np.load(MATRIX_PATH, allow_pickle=True, mmap_mode="r")
+def read_matrix(path=MATRIX_PATH):
+    matrix = np.load(path, mmap_mode="r")
     return matrix
 
 
+# plane of the matrix used for each piece code, promoted pawns, lances,
+# knights and silvers share the gold's one
+MATRIX_PLANE = (0, 1, 2, 3, 4, 5, 6, 9, 4, 4, 4, 4, 0, 8, 7, 0)
+
+
 def matrix_position(position, color: COLOR):
     x, y = position
     if color == COLOR.WHITE:
@@ -22,147 +35,697 @@ def matrix_position(position, color: COLOR):
     return 8 - x, 8 - y
 
 
+def positional_table(matrix):
+    """Returns the matrix as a table of integer hundredths indexed by colored piece and square."""
+
+    table = []
+    for piece in range(32):
+        color = COLOR(piece >> 4)
+        plane = MATRIX_PLANE[piece & 15]
+        table.append(
+            tuple(
+                round(100 * float(matrix[plane][matrix_position(coords(sq), color)]))
+                for sq in range(N_SQUARES)
+            )
+        )
+    return tuple(table)
+
+
+def evaluation_table(positional):
+    """Returns table of piece scores in hundredths from black's point of view.
+
+    Row `piece` of the table holds the value of the colored piece plus its positional
+    score on every square, negated for white pieces. The `EMPTY` row is zero, so a board
+    of colored pieces (`Core.squares`) indexes it directly.
+    """
+
+    table = np.zeros((EMPTY + 1, N_SQUARES), dtype=np.int64)
+    for piece in range(32):
+        sign = -1 if piece >> 4 else 1
+        table[piece] = [
+            sign * (VALUE[piece & 15] + value) for value in positional[piece]
+        ]
+    return table
+
+
+# tables of every matrix file loaded in this process, shared by all bots
+_tables = {}
+
+
+def load_tables(path=MATRIX_PATH):
+    """Returns the matrix of positional values in `path` with its positional and evaluation
+    tables (see `positional_table` and `evaluation_table`).
+
+    They are built once per process and shared read-only by all bots using the file.
+
+    Returns:
+        tuple: (matrix, positional table, evaluation table)
+    """
+
+    if path not in _tables:
+        matrix = read_matrix(path)
+        positional = positional_table(matrix)
+        table = evaluation_table(positional)
+        table.flags.writeable = False
+        _tables[path] = matrix, positional, table
+    return _tables[path]
+
+
+# HAND_WEIGHTS[color * N_KINDS + kind] - value of a piece in hand from black's point of view
+HAND_WEIGHTS = np.array(
+    HAND_VALUE + tuple(-value for value in HAND_VALUE), dtype=np.int64
+)
+SQUARE_INDEX = np.arange(N_SQUARES)
+
+
+def evaluate(table, boards, hands):
+    """Scores positions from black's point of view with a single gather and sum.
+
+    Args:
+        table (np.ndarray): table made by `evaluation_table`
+
+        boards (np.ndarray): colored piece on every square, shape (81,) or (n, 81)
+
+        hands (np.ndarray): counts of pieces in hand, shape (14,) or (n, 14)
+
+    Returns:
+        int | np.ndarray: score, or array of scores of a batch of positions
+    """
+
+    return table[boards, SQUARE_INDEX].sum(axis=-1) + hands @ HAND_WEIGHTS
+
+
+# Scores are in hundredths of a pawn, a mate found `ply` moves from the root
+# scores MATE - ply.
+MATE = 1_000_000
+MATE_BOUND = MATE - 1_000
+INFINITY = MATE + 1
+DRAW = 0
+
+MAX_DEPTH = 32
+
+# limits of the mate search run before the main search
+MATE_PROBE_NODES = 2_000
+MATE_PROBE_TABLE_MB = 2
+
+# share of the remaining main time spent on a single move
+MOVES_TO_GO = 30
+
+# node interval between checks of the deadline
+CHECK_INTERVAL = 1024
+
+# most nodes the quiescence search of a single leaf may visit
+QUIESCENCE_NODES = 512
+
+# material beyond a capture's gain that could still make it raise alpha
+DELTA_MARGIN = 200
+
+# seconds between checks of the stop flag while waiting for worker processes
+POLL_INTERVAL = 0.05
+
+# move ordering priorities
+TT_MOVE = 1 << 40
+CAPTURE = 1 << 36
+KILLER = 1 << 32
+
+
+class SearchTimeout(Exception):
+    pass
+
+
 class Bot:
-    def __init__(self, board, depth, width):
-        self.matrix = read_matrix()
+    def __init__(
+        self,
+        board,
+        depth=MAX_DEPTH,
+        tt_size_mb=16,
+        workers=1,
+        debug=False,
+        book_path=BOOK_PATH,
+        mate_probe=True,
+        matrix_path=MATRIX_PATH,
+    ):
+        """Initializes `Bot` object.
+
+        Args:
+            board (Board): board the bot plays on
+
+            depth (int, optional): maximum search depth. Defaults to MAX_DEPTH.
+
+            tt_size_mb (float, optional): size of the transposition table. Defaults to 16.
+
+            workers (int, optional): number of processes searching root moves in parallel,
+            1 searches in the calling thread only. Defaults to 1.
+
+            debug (bool, optional): check the incrementally updated evaluation against a full
+            recomputation at every leaf. Defaults to False.
+
+            book_path (str, optional): opening book file, None plays without a book.
+            Defaults to BOOK_PATH.
+
+            mate_probe (bool, optional): look for a forced mate with the tsume solver before
+            searching when the enemy king is exposed. Defaults to True.
+
+            matrix_path (str, optional): positional values of the evaluation. Defaults to
+            MATRIX_PATH.
+        """
+
+        self.matrix, self.positional, self.table = load_tables(matrix_path)
+        self.matrix_path = matrix_path
+        self.debug = debug
         self.board = board
+        self.core = board.core
+        self.core.set_positional(self.positional)
         self.depth = depth
-        self.width = width
-
-    def __test_move(self, piece, x, y, depth):
-        old_pos = piece.pos()
-        captured = self.board.grid[x][y]
-        was_promoted = None
-        if captured:
-            was_promoted = captured.promoted
-        self.board.move(piece, (x, y))
-        move_result = self.__evaluate(piece.color, depth)
-        self.board.revert_move(piece, captured, old_pos, was_promoted)
-        return move_result
-
-    def __test_drop(self, piece, x, y, depth):
-        self.board.drop(piece, (x, y))
-        drop_result = self.__evaluate(piece.color, depth)
-        self.board.revert_drop(piece)
-        return drop_result
-
-    def __evaluate(self, color: COLOR, depth: int):
-        if self.board.is_checkmate(color) and depth == self.depth:
-            return -depth * 20_000
-        if self.board.is_checkmate(color.opposite()):
-            return depth * 20_000
-        if self.board.is_check(color):
-            return -5_000
-        side_0 = sum(
-            piece.value_in_hand for piece in self.board.captured[color.value].values()
-        )
-        side_0 += sum(piece.value for piece in self.board.active[color.value].values())
-        side_1 = sum(
-            piece.value_in_hand
-            for piece in self.board.captured[color.opposite().value].values()
-        )
-        side_1 += sum(
-            piece.value for piece in self.board.active[color.opposite().value].values()
-        )
-        side_0 += sum(
-            self.matrix[pieces_dict[piece.name]][matrix_position(piece.pos(), color)]
-            for key, piece in self.board.active[color.value].items()
-        )
-        side_1 += sum(
-            self.matrix[pieces_dict[piece.name]][
-                matrix_position(piece.pos(), piece.color)
-            ]
-            for key, piece in self.board.active[color.opposite().value].items()
-        )
-        return side_0 - side_1
-
-    def __add_move(self, best_queue, color: COLOR, piece_sign: str, depth: int):
-        piece = self.board.active[color.value][piece_sign]
-        possible = self.board.get_available(piece, True)
-        for x, y in possible:
-            if piece.can_promote(x):
-                piece.promote()
-                best_queue.put(
-                    (-self.__test_move(piece, x, y, depth), x, y, piece, False, True)
-                )
-                piece.degrade()
-            best_queue.put(
-                (-self.__test_move(piece, x, y, 1), x, y, piece, False, False)
+        self.tt = TranspositionTable(tt_size_mb)
+        self.tt_size_mb = tt_size_mb
+        self.book = None if book_path is None else OpeningBook(book_path)
+        self.solver = None
+        if mate_probe:
+            self.solver = TsumeSolver(MATE_PROBE_TABLE_MB, MATE_PROBE_NODES)
+        self.workers = workers
+        self.pool = None
+        # set to stop the searches running in worker processes
+        self.pool_stop = None
+        self.nodes = 0
+        self.root_move = None
+        # whether a score searched since the flag was cleared depends on a repetition
+        self.repeated = False
+        self.deadline = None
+        # event of the running search which abandons it when set, see `Bot.best_move`
+        self.stop = None
+
+        # held by a background search, see `SearchWorker`
+        self.lock = threading.Lock()
+
+        self.killers = []
+        self.history = [0] * (1 << 16)
+
+    def __evaluate(self):
+        """Returns static score of the position from the point of view of the side to move."""
+
+        core = self.core
+        material = core.material
+        positional = core.positional
+        score = material[0] - material[1] + positional[0] - positional[1]
+        if self.debug:
+            full = evaluate(
+                self.table,
+                np.frombuffer(core.squares, dtype=np.uint8),
+                np.frombuffer(core.hands, dtype=np.uint8),
             )
+            assert score == full, f"incremental evaluation {score} != {full}"
+        return -score if core.side else score
+
+    def evaluate_moves(self, moves):
+        """Scores positions after each of `moves` at once.
+
+        Returns:
+            np.ndarray: static scores from the point of view of the side making the moves
+        """
+
+        core = self.core
+        boards = np.empty((len(moves), N_SQUARES), dtype=np.uint8)
+        hands = np.empty((len(moves), 2 * N_KINDS), dtype=np.uint8)
+        for i, move in enumerate(moves):
+            core.make(move)
+            boards[i] = np.frombuffer(core.squares, dtype=np.uint8)
+            hands[i] = np.frombuffer(core.hands, dtype=np.uint8)
+            core.unmake()
+        scores = evaluate(self.table, boards, hands)
+        return -scores if core.side else scores
+
+    def __order(self, moves, tt_move, ply):
+        """Sorts `moves` best first: the transposition table move, captures by MVV-LVA,
+        killer moves, the rest by history score (static score at the root) and captures
+        losing material by static exchange evaluation last."""
+
+        core = self.core
+        board = core.squares
+        killers = self.killers[ply]
+        history = self.history
+        side = core.side << 15
+        if ply == 0:
+            static = dict(zip(moves, self.evaluate_moves(moves).tolist()))
+
+        def priority(move):
+            if move == tt_move:
+                return TT_MOVE
+            victim = board[move & 127]
+            if victim != EMPTY:
+                frm = move >> 7 & 127
+                attacker = board[frm] & 15 if frm < 81 else 0
+                if VALUE[attacker] > VALUE[victim & 15]:
+                    see = core.see(move)
+                    if see < 0:
+                        return -CAPTURE + see
+                return CAPTURE + 16 * VALUE[victim & 15] - VALUE[attacker] // 16
+            if move & PROMOTION:
+                return CAPTURE
+            if move in killers:
+                return KILLER + (move == killers[0])
+            if ply == 0:
+                return static[move]
+            return history[side | move & 0x7FFF]
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def __store_cutoff(self, move, depth, ply):
+        core = self.core
+        if core.squares[move & 127] != EMPTY or move & PROMOTION:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[core.side << 15 | move & 0x7FFF] += depth * depth
+
+    def __count_node(self):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and (
+            self.stop is not None
+            and self.stop.is_set()
+            or self.deadline is not None
+            and time.monotonic() >= self.deadline
+        ):
+            raise SearchTimeout
+
+    def __quiesce(self, alpha, beta, ply, checks):
+        """Searches captures and promotions until the position is quiet.
+
+        The side to move may stand pat on the static score unless it is in check, when all
+        evasions are searched. Captures which cannot raise alpha even with a margin (delta
+        pruning) or lose material by static exchange evaluation are skipped. The search of one leaf is limited to
+        `QUIESCENCE_NODES` nodes, after which positions are scored statically.
+
+        Args:
+            alpha (int): lower bound of the window
+
+            beta (int): upper bound of the window
+
+            ply (int): distance from the root
+
+            checks (bool): search checking drops as well
+
+        Returns:
+            int: score of the position from the point of view of the side to move
+        """
+
+        self.__count_node()
+        self.quiescence_nodes -= 1
+
+        core = self.core
+        in_check = core.in_check(core.side)
+        if in_check:
+            moves = core.legal_moves()
+            if not moves:
+                return -MATE + ply
+            best_score = stand_pat = -INFINITY
+        else:
+            best_score = stand_pat = self.__evaluate()
+            if best_score >= beta or self.quiescence_nodes <= 0:
+                return best_score
+            alpha = max(alpha, best_score)
+            moves = core.legal_moves(captures=True)
+            if checks:
+                moves += core.checking_drops()
+
+        while len(self.killers) <= ply:
+            self.killers.append([0, 0])
+
+        board = core.squares
+        for move in self.__order(moves, 0, ply):
+            victim = board[move & 127]
+            if not in_check and victim != EMPTY:
+                gain = EXCHANGE_VALUE[victim & 15]
+                if not move & PROMOTION and stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                attacker = board[move >> 7 & 127] & 15
+                if VALUE[attacker] > VALUE[victim & 15] and core.see(move) < 0:
+                    continue
+
+            core.make(move)
+            score = -self.__quiesce(-beta, -alpha, ply + 1, False)
+            core.unmake()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        return best_score
+
+    def __search(self, depth, alpha, beta, ply):
+        """Negamax alpha-beta search with principal variation search.
+
+        Args:
+            depth (int): remaining depth
+
+            alpha (int): lower bound of the window
+
+            beta (int): upper bound of the window
+
+            ply (int): distance from the root
 
-    def __add_drop(self, best_queue, color: COLOR, piece_sign: str, depth: int):
-        piece = self.board.captured[color.value][piece_sign]
-        possible = self.board.get_available_drops(piece, True)
-        for x, y in possible:
-            best_queue.put(
-                (-self.__test_drop(piece, x, y, depth), x, y, piece, True, False)
+        Returns:
+            int: score of the position from the point of view of the side to move
+        """
+
+        self.__count_node()
+
+        core = self.core
+        key = core.hash
+        tt_move = 0
+
+        # a repetition is scored as the sennichite it could be repeated into
+        if ply > 0 and core.repetitions():
+            self.repeated = True
+            loser = core.perpetual_check()
+            if loser is None:
+                return DRAW
+            return -MATE + ply if loser == core.side else MATE - ply
+
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_score, bound, tt_move = entry
+            if tt_depth >= depth and ply > 0:
+                tt_score = from_tt(tt_score, ply)
+                if (
+                    bound == EXACT
+                    or (bound == LOWER and tt_score >= beta)
+                    or (bound == UPPER and tt_score <= alpha)
+                ):
+                    return tt_score
+
+        if depth <= 0:
+            self.quiescence_nodes = QUIESCENCE_NODES
+            return self.__quiesce(alpha, beta, ply, True)
+
+        while len(self.killers) <= ply:
+            self.killers.append([0, 0])
+
+        moves = core.legal_moves()
+        # no legal move, the side to move is mated
+        if not moves:
+            return -MATE + ply
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        # the score depends on the path if it does below, see `Bot.repeated`
+        repeated = self.repeated
+        self.repeated = False
+
+        for i, move in enumerate(self.__order(moves, tt_move, ply)):
+            core.make(move)
+            if i == 0:
+                score = -self.__search(depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self.__search(depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.__search(depth - 1, -beta, -alpha, ply + 1)
+            core.unmake()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if ply == 0:
+                    self.root_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.__store_cutoff(move, depth, ply)
+                        break
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        # scores of repetitions would be wrong in positions reached by another path
+        if not self.repeated:
+            self.tt.store(key, depth, to_tt(best_score, ply), bound, best_move)
+        self.repeated |= repeated
+
+        return best_score
+
+    def __parallel_root(self, depth):
+        """Searches the root to `depth` splitting its moves among worker processes.
+
+        The first move in order is searched here with a full window, the rest are sent to
+        the pool and searched against its score like in principal variation search.
+        """
+
+        core = self.core
+        entry = self.tt.probe(core.hash)
+        tt_move = 0 if entry is None else entry[3]
+        if not self.killers:
+            self.killers.append([0, 0])
+
+        moves = self.__order(core.legal_moves(), tt_move, 0)
+        if not moves:
+            return -MATE
+
+        core.make(moves[0])
+        alpha = -self.__search(depth - 1, -INFINITY, INFINITY, 1)
+        core.unmake()
+        best_move = moves[0]
+
+        self.start_pool()
+        self.pool_stop.clear()
+        time_left = None
+        if self.deadline is not None:
+            time_left = self.deadline - time.monotonic()
+        # workers get a snapshot, pickling the core would copy its undo stack and table
+        position = Position.from_core(core)
+        futures = [
+            self.pool.submit(
+                _search_move,
+                position,
+                move,
+                depth,
+                alpha,
+                time_left,
+                self.tt.generation,
             )
+            for move in moves[1:]
+        ]
 
-    def __test_best_moves_depth1(self, color: pieces.COLOR, depth: int) -> list[tuple]:
-        best = queue.PriorityQueue()
-        result = []
+        for move, future in zip(moves[1:], futures):
+            while not wait((future,), POLL_INTERVAL).done:
+                if self.stop is not None and self.stop.is_set():
+                    break
+            if not future.done():
+                score = None
+            else:
+                score, nodes, repeated = future.result()
+                self.nodes += nodes
+                self.repeated |= repeated
+            if score is None:
+                # moves already being searched only stop on the event, wait for them so
+                # that they don't delay the next search
+                self.pool_stop.set()
+                for pending in futures:
+                    pending.cancel()
+                wait(futures)
+                raise SearchTimeout
+            if score > alpha:
+                alpha = score
+                best_move = move
 
-        for piece_sign in list(self.board.active[color.value]):
-            self.__add_move(best, color, piece_sign, depth)
+        self.root_move = best_move
+        if not self.repeated:
+            self.tt.store(core.hash, depth, alpha, EXACT, best_move)
+        return alpha
 
-        for piece_sign in list(self.board.captured[color.value]):
-            self.__add_drop(best, color, piece_sign, depth)
+    def search_move(
+        self, position, move, depth, alpha, time_limit=None, generation=None
+    ):
+        """Scores root `move` of `position` with a search to `depth`, proving first that it
+        is better than `alpha` with a null window. Worker processes of a parallel search
+        run it.
 
-        i = 0
-        while i < self.width and not best.empty():
-            move = best.get()
-            negative_value, x, y, piece, dropped, promoted = move
-            result.append((-negative_value, x, y, piece, dropped, promoted))
-            i += 1
-        # returns up to n best moves
-        # checking all would take too long
-        return result
+        Args:
+            position (Position): snapshot of the position
+
+            move (int): root move
+
+            depth (int): depth of the search, counting the root move
+
+            alpha (int): score of the best root move so far
 
-    def best_move(self, color: COLOR, depth: int = None):
+            time_limit (float, optional): seconds to search for. Defaults to no limit.
+
+            generation (int, optional): generation of the entries stored in the table, the
+            one of the main search so that workers replace entries of earlier ones. Defaults
+            to the current one.
+
+        Returns:
+            tuple: score of the move (None if the time limit passed), number of nodes searched
+            and whether the score depends on a repetition
         """
-        function, that returns the best move for given depth
-        tests width moves for depth, for each calculating an opposite move with depth -1
-        :param color:
-        :param depth: depth: current depth of search
+
+        core = position.to_core()
+        core.set_positional(self.positional)
+        self.core = core
+        self.nodes = 0
+        self.repeated = False
+        if generation is not None:
+            self.tt.generation = generation
+        self.deadline = None if time_limit is None else time.monotonic() + time_limit
+
+        core.make(move)
+        try:
+            score = -self.__search(depth - 1, -alpha - 1, -alpha, 1)
+            if score > alpha:
+                score = -self.__search(depth - 1, -INFINITY, -alpha, 1)
+        except SearchTimeout:
+            score = None
+        core.unmake()
+
+        self.deadline = None
+        self.core = self.board.core
+        return score, self.nodes, self.repeated
+
+    def start_pool(self):
+        """Starts worker processes of the parallel search unless they are running and waits
+        until they are ready, e.g. so that a timed search doesn't pay for starting them.
+        Their tables start empty."""
+
+        if self.pool is not None:
+            return
+        self.pool_stop = multiprocessing.Event()
+        self.pool = ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(self.tt_size_mb, self.matrix_path, self.pool_stop),
+        )
+        wait([self.pool.submit(_worker_ready) for _ in range(self.workers)])
+
+    def close(self):
+        """Shuts down worker processes of the parallel search."""
+
+        if self.pool is not None:
+            self.pool_stop.set()
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+            self.pool_stop = None
+
+    def time_budget(self, color: COLOR):
+        """Returns seconds to spend on the next move of `color` given its clock."""
+
+        clock = self.board.clock
+        remaining = clock.get_time(color) - clock.byoyomi
+        if remaining <= 0:
+            return 0.8 * clock.byoyomi
+        return min(
+            remaining / MOVES_TO_GO + 0.8 * clock.increment + 0.8 * clock.byoyomi,
+            0.5 * remaining + 0.8 * clock.byoyomi,
+        )
+
+    def best_move(
+        self,
+        color: COLOR,
+        depth: int = None,
+        time_limit: float = None,
+        core=None,
+        stop: threading.Event = None,
+    ):
+        """Searches the position with iterative deepening and returns the best move of `color`.
+
+        Every iteration is a full alpha-beta search one ply deeper than the previous one. When
+        the time limit passes the running iteration is abandoned and the result of the last
+        completed one is returned; the first iteration always completes. Positions in the
+        opening book are answered with a book move scored 0 without searching, a mate found
+        by the mate probe is played right away.
+
+        Args:
+            color (COLOR): side to move, the search runs for `board.core.side`
+
+            depth (int, optional): maximum depth of the search. Defaults to `Bot.depth`.
+
+            time_limit (float, optional): seconds to search for. Defaults to budget derived
+            from the clock of `color`, pass `float("inf")` to search to full depth.
+
+            core (Core, optional): position to search instead of `board.core`, e.g. a copy
+            searched in a background thread.
+
+            stop (threading.Event, optional): event which abandons the search like the time
+            limit passing once it is set. Defaults to None.
+
+        Returns:
+            tuple | None: pair of the move's score and the move (see `engine.moves`) or None if
+            there is no legal move
         """
+
+        if core is None:
+            core = self.board.core
+        if self.book is not None:
+            move = self.book.choose(core.hash)
+            if move is not None and move in core.legal_moves():
+                return 0, move
+
         if depth is None:
             depth = self.depth
-        if depth == 1:
-            result = self.__test_best_moves_depth1(color, 1)
-            if result and result[0][0] > -10_000:
-                return result[0]
+        if time_limit is None:
+            time_limit = self.time_budget(color)
 
-        else:
-            potential_moves = self.__test_best_moves_depth1(color, depth)
-            best_move = None
-            worst_move_val = float("inf")
-            for move in potential_moves:
-                value, x, y, piece, dropped, promoted = move
-                old_pos = piece.pos()
-                captured = self.board.grid[x][y]
-                was_promoted = None
-                if captured:
-                    was_promoted = captured.promoted
-                if dropped:
-                    self.board.drop(piece, (x, y))
-                else:
-                    self.board.move(piece, (x, y))
-                opposite_move = self.best_move(color.opposite(), depth - 1)
-                if dropped:
-                    self.board.revert_drop(piece)
+        if self.solver is not None and king_exposed(core, core.side ^ 1):
+            self.solver.time_limit = time_limit / 4
+            mate = self.solver.solve(core)
+            if mate is not None:
+                return MATE - len(mate), mate[0]
+
+        self.core = core
+        if core.table is not self.positional:
+            core.set_positional(self.positional)
+        start = time.monotonic()
+        stack_size = len(core.stack)
+
+        self.nodes = 0
+        self.tt.new_search()
+        self.killers = []
+        self.history = [value // 2 for value in self.history]
+        self.deadline = None
+        self.stop = stop
+        result = None
+
+        for iteration in range(1, depth + 1):
+            self.root_move = None
+            self.repeated = False
+            try:
+                if self.workers > 1 and iteration > 1:
+                    score = self.__parallel_root(iteration)
                 else:
-                    self.board.revert_move(piece, captured, old_pos, was_promoted)
-                if opposite_move is not None and opposite_move[0] < worst_move_val:
-                    best_move = (
-                        -opposite_move[0],
-                        x,
-                        y,
-                        piece,
-                        dropped,
-                        promoted,
-                    )
-                    worst_move_val = opposite_move[0]
-            return best_move
+                    score = self.__search(iteration, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                while len(core.stack) > stack_size:
+                    core.unmake()
+                break
+
+            if self.root_move is None:
+                return None
+            result = score, self.root_move
+            self.deadline = start + time_limit
+
+            # a found mate won't change unless it came from a repetition, and the next
+            # iteration would not finish in time
+            elapsed = time.monotonic() - start
+            if (
+                abs(score) > MATE_BOUND
+                and not self.repeated
+                or elapsed > time_limit / 2
+            ):
+                break
+
+        self.deadline = None
+        self.stop = None
+        self.core = self.board.core
+        return result
 
     def play_against_bot(self, bot):
         bots = [self, bot]
@@ -177,21 +740,99 @@ class Bot:
             if self.board.is_checkmate(color):
                 print("mat")
                 return color.opposite()
+            if self.board.is_sennichite():
+                print("sennichite")
+                loser = self.board.perpetual_checker()
+                return None if loser is None else loser.opposite()
             move = bots[i % 2].best_move(color)
             if move is None:
                 print("pat")
                 return None
-            _, x, y, piece, dropped, promoted = move
-            if promoted:
-                piece.promote()
-            if dropped:
-                self.board.drop(piece, (x, y))
-            else:
-                self.board.move(piece, (x, y))
+            self.board.play(move[1])
             self.board.end_turn()
             self.board.show()
             time.sleep(0.2)
             # print(self.__evaluate(COLOR.WHITE, 1))
             i += 1
-        result = self.__evaluate(COLOR.WHITE, 1)
+        result = self.__evaluate()
+        if self.board.core.side == COLOR.BLACK.value:
+            result = -result
         return COLOR.WHITE if result > 0 else COLOR.BLACK
+
+
+def to_tt(score, ply):
+    """Makes mate scores relative to the position before storing them."""
+
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def from_tt(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+# bot of a worker process of the parallel search
+_worker_bot = None
+
+
+def _init_worker(tt_size_mb, matrix_path, stop):
+    global _worker_bot
+    from engine.board import Board
+
+    _worker_bot = Bot(Board(), tt_size_mb=tt_size_mb, matrix_path=matrix_path)
+    _worker_bot.stop = stop
+
+
+def _worker_ready():
+    return _worker_bot is not None
+
+
+def _search_move(position, move, depth, alpha, time_limit, generation):
+    return _worker_bot.search_move(position, move, depth, alpha, time_limit, generation)
+
+
+class SearchWorker:
+    def __init__(self, bot: Bot, color: COLOR):
+        """Starts `bot.best_move` for `color` in a background thread. The search runs on a
+        copy of the position, so the board can be drawn and queried meanwhile.
+
+        Args:
+            bot (Bot): bot to search with
+
+            color (COLOR): side to move
+        """
+
+        self.bot = bot
+        self.result = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self.stop = threading.Event()
+
+        self.thread = threading.Thread(
+            target=self.__run, args=(color, bot.board.core.copy()), daemon=True
+        )
+        self.thread.start()
+
+    def __run(self, color, core):
+        try:
+            # a cancelled search of the same bot may still be unwinding
+            with self.bot.lock:
+                self.result = self.bot.best_move(color, core=core, stop=self.stop)
+        finally:
+            self.done.set()
+
+    def finished(self):
+        return self.done.is_set() and not self.cancelled
+
+    def cancel(self):
+        """Stops the search, its result is discarded."""
+
+        self.cancelled = True
+        self.stop.set()
@@ -0,0 +1,709 @@
+from engine.bitboard import (
+    BETWEEN,
+    BIT,
+    FILES,
+    FULL,
+    N_SQUARES,
+    PROMOTION_ZONE,
+    RANKS,
+    SIZE,
+    STEP_ATTACKS,
+    attacks,
+    bishop_attacks,
+    lance_attacks,
+    lsb,
+    rook_attacks,
+    squares,
+)
+from engine.moves import DROP, PROMOTION
+from engine.zobrist import HAND_KEYS, PIECE_KEYS, SIDE_KEY
+from engine.pieces import (
+    PAWN,
+    LANCE,
+    KNIGHT,
+    SILVER,
+    GOLD,
+    BISHOP,
+    ROOK,
+    KING,
+    PROMOTED,
+    PROMOTABLE,
+    VALUES,
+    HAND_VALUES,
+)
+
+# A colored piece packs the color value above the piece code, so colored
+# pieces are 0..31 and fit a byte together with the EMPTY marker.
+EMPTY = 32
+N_KINDS = 7  # kinds which can be held in hand, i.e. all but the king
+
+# Piece values in hundredths, integral so that incremental updates are exact
+VALUE = tuple(round(value * 100) for value in VALUES)
+HAND_VALUE = tuple(round(value * 100) for value in HAND_VALUES)
+
+# EXCHANGE_VALUE[code] - material swing of capturing a piece: its value on board
+# leaves the opponent and it enters the capturer's hand
+EXCHANGE_VALUE = tuple(
+    VALUE[code] + (HAND_VALUE[code & 7] if code & 7 != KING else 0)
+    for code in range(16)
+)
+
+# Piece codes from the least valuable, the order attackers recapture in
+CAPTURE_ORDER = sorted(
+    (code for code in range(16) if code not in (GOLD | PROMOTED, KING | PROMOTED)),
+    key=lambda code: VALUE[code],
+)
+
+
+def _drop_zone(color, kind):
+    # a pawn or lance on the last rank, or a knight on the last two, could never move
+    dead = {PAWN: 1, LANCE: 1, KNIGHT: 2}.get(kind, 0)
+    rows = range(dead) if color == 0 else range(SIZE - dead, SIZE)
+    zone = FULL
+    for row in rows:
+        zone &= ~RANKS[row]
+    return zone
+
+
+# DROP_ZONE[color][kind] - squares on which a piece may be dropped
+DROP_ZONE = tuple(
+    tuple(_drop_zone(color, kind) for kind in range(N_KINDS)) for color in (0, 1)
+)
+
+
+# piece-square table used until one is set with `Core.set_positional`
+NO_POSITIONAL = tuple((0,) * N_SQUARES for piece in range(32))
+
+
+def colored(color, code):
+    return color << 4 | code
+
+
+class Core:
+    def __init__(self):
+        """Initializes an empty position core.
+
+        The position is held as a byte per square (`squares`), a bitboard per colored piece
+        (`pieces`), occupancy bitboards per color (`occupied`) and per color counts of pieces
+        in hand (`hands`, indexed by `color * N_KINDS + kind`). `material` keeps the value of
+        each side's pieces on board and in hand and `positional` the sum of their scores from
+        the piece-square table `table`. `hash` is the Zobrist hash of the position and `stack`
+        holds undo records of moves made. `prefix` holds pairs of the hash and whether the
+        side to move was in check of positions before the first of them whose moves can't be
+        taken back, e.g. those before a `Position` snapshot, oldest first. `seen` counts the
+        hashes of all earlier positions, so that repetitions are found without going through
+        the stack.
+        """
+
+        self.squares = bytearray([EMPTY]) * N_SQUARES
+        self.pieces = [0] * 32
+        self.occupied = [0, 0]
+        self.hands = bytearray(2 * N_KINDS)
+        self.material = [0, 0]
+        self.positional = [0, 0]
+        self.table = NO_POSITIONAL
+        self.side = 0
+        self.hash = 0
+        self.stack = []
+        self.prefix = ()
+        self.seen = {}
+
+    def copy(self):
+        other = Core.__new__(Core)
+        other.squares = bytearray(self.squares)
+        other.pieces = list(self.pieces)
+        other.occupied = list(self.occupied)
+        other.hands = bytearray(self.hands)
+        other.material = list(self.material)
+        other.positional = list(self.positional)
+        other.table = self.table
+        other.side = self.side
+        other.hash = self.hash
+        other.stack = list(self.stack)
+        other.prefix = self.prefix
+        other.seen = dict(self.seen)
+        return other
+
+    def set_position(self, squares, hands, side):
+        """Replaces the position with a byte per square and counts in hand, indexed like
+        `squares` and `hands`, and `side` to move. All accumulators and the hash are
+        recomputed in one pass, which is quicker than placing pieces one by one.
+        """
+
+        self.squares = squares
+        self.hands = hands
+        self.side = side
+        self.stack = []
+        self.prefix = ()
+        self.seen = {}
+        pieces = self.pieces = [0] * 32
+        occupied = self.occupied = [0, 0]
+        material = self.material = [0, 0]
+        positional = self.positional = [0, 0]
+        table = self.table
+        key = SIDE_KEY if side else 0
+        for sq, piece in enumerate(squares):
+            if piece != EMPTY:
+                bit = BIT[sq]
+                pieces[piece] |= bit
+                occupied[piece >> 4] |= bit
+                material[piece >> 4] += VALUE[piece & 15]
+                positional[piece >> 4] += table[piece][sq]
+                key ^= PIECE_KEYS[piece][sq]
+        for index, count in enumerate(hands):
+            if count:
+                material[index >= N_KINDS] += count * HAND_VALUE[index % N_KINDS]
+                key ^= HAND_KEYS[index][0] ^ HAND_KEYS[index][count]
+        self.hash = key
+
+    def set_positional(self, table):
+        """Sets piece-square table `table[piece][sq]` of scores of colored pieces and
+        recomputes `positional` with it."""
+
+        self.table = table
+        self.positional = [0, 0]
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY:
+                self.positional[piece >> 4] += table[piece][sq]
+
+    def set_side(self, color):
+        if color != self.side:
+            self.side = color
+            self.hash ^= SIDE_KEY
+
+    def king_square(self, color):
+        king = self.pieces[colored(color, KING)]
+        return lsb(king) if king else None
+
+    def attacks_from(self, sq, occupied=None):
+        """Returns bitboard of squares attacked by the piece standing on square `sq`."""
+
+        if occupied is None:
+            occupied = self.occupied[0] | self.occupied[1]
+        piece = self.squares[sq]
+        return attacks(piece >> 4, piece & 15, sq, occupied)
+
+    def attackers(self, sq, color, occupied=None):
+        """Returns bitboard of `color` pieces attacking square `sq`.
+
+        Args:
+            sq (int): attacked square
+
+            color (int): color value of the attacking side
+
+            occupied (int, optional): occupancy to use for sliding pieces. Defaults to the current one.
+
+        Returns:
+            int: bitboard of attacking pieces
+        """
+
+        if occupied is None:
+            occupied = self.occupied[0] | self.occupied[1]
+
+        # A piece attacks `sq` exactly when the same piece of the other color
+        # standing on `sq` would attack it back.
+        pieces = self.pieces
+        base = color << 4
+        step = STEP_ATTACKS[color ^ 1]
+        golds = (
+            pieces[base | GOLD]
+            | pieces[base | PAWN | PROMOTED]
+            | pieces[base | LANCE | PROMOTED]
+            | pieces[base | KNIGHT | PROMOTED]
+            | pieces[base | SILVER | PROMOTED]
+        )
+        horses = pieces[base | BISHOP | PROMOTED]
+        dragons = pieces[base | ROOK | PROMOTED]
+
+        found = (
+            step[PAWN][sq] & pieces[base | PAWN]
+            | step[KNIGHT][sq] & pieces[base | KNIGHT]
+            | step[SILVER][sq] & pieces[base | SILVER]
+            | step[GOLD][sq] & golds
+            | step[KING][sq] & (pieces[base | KING] | horses | dragons)
+            | lance_attacks(color ^ 1, sq, occupied) & pieces[base | LANCE]
+            | rook_attacks(sq, occupied) & (pieces[base | ROOK] | dragons)
+            | bishop_attacks(sq, occupied) & (pieces[base | BISHOP] | horses)
+        )
+
+        return found & occupied
+
+    def in_check(self, color):
+        king = self.king_square(color)
+        return king is not None and self.attackers(king, color ^ 1) != 0
+
+    def make(self, move):
+        """Makes `move` (see `engine.moves`) and pushes its undo record on `stack`.
+
+        The moving side is the color of the moved piece, or `side` for drops.
+        """
+
+        board = self.squares
+        pieces = self.pieces
+        occupied = self.occupied
+        material = self.material
+        positional = self.positional
+        table = self.table
+        hands = self.hands
+        old_hash = key = self.hash
+        to = move & 127
+        frm = move >> 7 & 127
+        to_bit = BIT[to]
+
+        if frm >= DROP:
+            color = self.side
+            kind = frm - DROP
+            piece = color << 4 | kind
+            index = color * N_KINDS + kind
+            count = hands[index]
+            hands[index] = count - 1
+            key ^= HAND_KEYS[index][count] ^ HAND_KEYS[index][count - 1]
+            material[color] += VALUE[kind] - HAND_VALUE[kind]
+            captured = EMPTY
+        else:
+            piece = board[frm]
+            color = piece >> 4
+            from_bit = BIT[frm]
+            board[frm] = EMPTY
+            pieces[piece] ^= from_bit
+            occupied[color] ^= from_bit
+            positional[color] -= table[piece][frm]
+            key ^= PIECE_KEYS[piece][frm]
+
+            captured = board[to]
+            if captured != EMPTY:
+                pieces[captured] ^= to_bit
+                occupied[color ^ 1] ^= to_bit
+                material[color ^ 1] -= VALUE[captured & 15]
+                positional[color ^ 1] -= table[captured][to]
+                key ^= PIECE_KEYS[captured][to]
+                kind = captured & 7
+                if kind != KING:
+                    index = color * N_KINDS + kind
+                    count = hands[index]
+                    hands[index] = count + 1
+                    key ^= HAND_KEYS[index][count] ^ HAND_KEYS[index][count + 1]
+                    material[color] += HAND_VALUE[kind]
+
+            if move & PROMOTION:
+                material[color] += VALUE[piece & 15 | PROMOTED] - VALUE[piece & 15]
+                piece |= PROMOTED
+
+        board[to] = piece
+        pieces[piece] |= to_bit
+        occupied[color] |= to_bit
+        positional[color] += table[piece][to]
+        key ^= PIECE_KEYS[piece][to]
+        if self.side == color:
+            key ^= SIDE_KEY
+        self.stack.append((move, captured, old_hash, self.side))
+        self.seen[old_hash] = self.seen.get(old_hash, 0) + 1
+        self.side = color ^ 1
+        self.hash = key
+
+    def unmake(self):
+        """Takes back the last move made with `Core.make`."""
+
+        move, captured, key, side = self.stack.pop()
+        self.hash = key
+        count = self.seen[key]
+        if count > 1:
+            self.seen[key] = count - 1
+        else:
+            del self.seen[key]
+        board = self.squares
+        pieces = self.pieces
+        occupied = self.occupied
+        material = self.material
+        positional = self.positional
+        table = self.table
+        to = move & 127
+        frm = move >> 7 & 127
+        to_bit = BIT[to]
+
+        piece = board[to]
+        color = piece >> 4
+        pieces[piece] ^= to_bit
+        occupied[color] ^= to_bit
+        positional[color] -= table[piece][to]
+
+        if frm >= DROP:
+            kind = frm - DROP
+            self.hands[color * N_KINDS + kind] += 1
+            material[color] -= VALUE[kind] - HAND_VALUE[kind]
+        else:
+            if move & PROMOTION:
+                piece ^= PROMOTED
+                material[color] -= VALUE[piece & 15 | PROMOTED] - VALUE[piece & 15]
+
+            from_bit = BIT[frm]
+            board[frm] = piece
+            pieces[piece] |= from_bit
+            occupied[color] |= from_bit
+            positional[color] += table[piece][frm]
+
+            if captured != EMPTY:
+                pieces[captured] |= to_bit
+                occupied[color ^ 1] |= to_bit
+                material[color ^ 1] += VALUE[captured & 15]
+                positional[color ^ 1] += table[captured][to]
+                kind = captured & 7
+                if kind != KING:
+                    self.hands[color * N_KINDS + kind] -= 1
+                    material[color] -= HAND_VALUE[kind]
+
+        board[to] = captured
+        self.side = side
+
+    def __promotions(self, color, code, frm):
+        """Returns bitboards of the squares a piece moving from `frm` may promote on, i.e.
+        all if it starts in the promotion zone, else the zone, and of the squares it may
+        stay unpromoted on, i.e. where it could still move afterwards."""
+
+        if not PROMOTABLE[code]:
+            return 0, FULL
+        zone = PROMOTION_ZONE[color]
+        return FULL if BIT[frm] & zone else zone, DROP_ZONE[color][code]
+
+    def drop_targets(self, color, kind):
+        """Returns bitboard of squares on which `color` may drop a piece of `kind`."""
+
+        occupied = self.occupied[0] | self.occupied[1]
+        targets = DROP_ZONE[color][kind] & ~occupied
+
+        if kind == PAWN:
+            for sq in squares(self.pieces[color << 4 | PAWN]):
+                targets &= ~FILES[sq % SIZE]
+
+            # a pawn may not be dropped to give mate (uchifuzume)
+            king = self.king_square(color ^ 1)
+            if king is not None:
+                front = king + SIZE if color == 0 else king - SIZE
+                if (
+                    0 <= front < N_SQUARES
+                    and targets & BIT[front]
+                    and self.__drop_mates(color, front)
+                ):
+                    targets &= ~BIT[front]
+
+        return targets
+
+    def __drop_mates(self, color, sq):
+        side = self.side
+        self.set_side(color)
+        self.make((DROP + PAWN) << 7 | sq)
+        mates = not self.has_legal_move()
+        self.unmake()
+        self.set_side(side)
+        return mates
+
+    def moves(self):
+        """Returns list of pseudo-legal moves of the side to move, including drops."""
+
+        color = self.side
+        board = self.squares
+        own = self.occupied[color]
+        occupied = own | self.occupied[color ^ 1]
+        result = []
+
+        for frm in squares(own):
+            code = board[frm] & 15
+            targets = attacks(color, code, frm, occupied) & ~own
+            promotes, alive = self.__promotions(color, code, frm)
+            for to in squares(targets):
+                move = to | frm << 7
+                if BIT[to] & promotes:
+                    result.append(move | PROMOTION)
+                    if not BIT[to] & alive:
+                        continue
+                result.append(move)
+
+        hands = self.hands
+        for kind in range(N_KINDS):
+            if hands[color * N_KINDS + kind]:
+                drop = (DROP + kind) << 7
+                for to in squares(self.drop_targets(color, kind)):
+                    result.append(to | drop)
+
+        return result
+
+    def pins(self, color, king):
+        """Returns pinned pieces of `color` whose king stands on square `king`.
+
+        Returns:
+            dict: squares of pinned pieces mapped to bitboards of squares they may move to
+            without exposing the king, i.e. the line to the pinning piece including it
+        """
+
+        them = color ^ 1
+        base = them << 4
+        pieces = self.pieces
+        occupied = self.occupied[0] | self.occupied[1]
+        snipers = (
+            rook_attacks(king, 0)
+            & (pieces[base | ROOK] | pieces[base | ROOK | PROMOTED])
+            | bishop_attacks(king, 0)
+            & (pieces[base | BISHOP] | pieces[base | BISHOP | PROMOTED])
+            | lance_attacks(color, king, 0) & pieces[base | LANCE]
+        )
+
+        pinned = {}
+        for sniper in squares(snipers):
+            line = BETWEEN[king][sniper]
+            blockers = line & occupied
+            if blockers & self.occupied[color] and not blockers & (blockers - 1):
+                pinned[lsb(blockers)] = line | BIT[sniper]
+        return pinned
+
+    def legal_moves(self, captures=False):
+        """Returns list of legal moves of the side to move, including drops.
+
+        Checking pieces and pins are found once, so unlike `Core.moves` no move needs to be
+        made to test it. In check only evasions are generated: king moves, captures of a
+        single checking piece and interpositions, by drops too.
+
+        Args:
+            captures (bool, optional): generate only captures and promotions, no drops.
+            Defaults to False.
+        """
+
+        color = self.side
+        king = self.king_square(color)
+        if king is None:
+            return self.moves()
+
+        them = color ^ 1
+        board = self.squares
+        own = self.occupied[color]
+        occupied = own | self.occupied[them]
+        # squares quiet moves may go to, i.e. none when only captures are generated
+        quiet = 0 if captures else ~occupied
+        result = []
+
+        without_king = occupied ^ BIT[king]
+        king_targets = STEP_ATTACKS[color][KING][king] & (self.occupied[them] | quiet)
+        for to in squares(king_targets):
+            if not self.attackers(to, them, without_king):
+                result.append(to | king << 7)
+
+        checkers = self.attackers(king, them)
+        if checkers & (checkers - 1):
+            return result
+        if checkers:
+            blocks = BETWEEN[king][lsb(checkers)]
+            evasions = blocks | checkers
+        else:
+            blocks = evasions = FULL
+
+        pinned = self.pins(color, king)
+        for frm in squares(own ^ BIT[king]):
+            code = board[frm] & 15
+            promotes, alive = self.__promotions(color, code, frm)
+            targets = (self.occupied[them] | quiet | promotes) & ~own & evasions
+            targets &= attacks(color, code, frm, occupied)
+            if frm in pinned:
+                targets &= pinned[frm]
+            for to in squares(targets):
+                move = to | frm << 7
+                if BIT[to] & promotes:
+                    result.append(move | PROMOTION)
+                    if not BIT[to] & alive or captures and not BIT[to] & occupied:
+                        continue
+                result.append(move)
+
+        if captures or not blocks:
+            return result
+
+        hands = self.hands
+        for kind in range(N_KINDS):
+            if hands[color * N_KINDS + kind]:
+                drop = (DROP + kind) << 7
+                for to in squares(self.drop_targets(color, kind) & blocks):
+                    result.append(to | drop)
+
+        return result
+
+    def checking_drops(self):
+        """Returns list of drops of the side to move which give check."""
+
+        color = self.side
+        king = self.king_square(color ^ 1)
+        if king is None:
+            return []
+
+        occupied = self.occupied[0] | self.occupied[1]
+        hands = self.hands
+        result = []
+        for kind in range(N_KINDS):
+            if hands[color * N_KINDS + kind]:
+                drop = (DROP + kind) << 7
+                # a piece attacks the king from where the king would attack the same piece
+                checks = attacks(color ^ 1, kind, king, occupied)
+                for to in squares(self.drop_targets(color, kind) & checks):
+                    result.append(to | drop)
+        return result
+
+    def repetitions(self):
+        """Returns how many times the current position occurred before on `stack`."""
+
+        return self.seen.get(self.hash, 0)
+
+    def perpetual_check(self):
+        """Returns the color which gave check with each of its moves since the current
+        position last occurred, whose perpetual check loses under the sennichite rule.
+
+        Returns:
+            int | None: color, None if the position did not occur before or neither side
+            checked all the time
+        """
+
+        key = self.hash
+        start = len(self.stack) - 1
+        while start >= 0 and self.stack[start][2] != key:
+            start -= 1
+        prefix = self.prefix
+        earlier = len(prefix) - 1
+        if start < 0:
+            while earlier >= 0 and prefix[earlier][0] != key:
+                earlier -= 1
+            if earlier < 0:
+                return None
+
+        checking = [True, True]
+        moves = []
+        while len(self.stack) > max(start, 0):
+            # the side to move is in check from the move made last
+            if not self.in_check(self.side):
+                checking[self.side ^ 1] = False
+            moves.append(self.stack[-1][0])
+            self.unmake()
+        if start < 0:
+            # the position occurred before the stack, the rest of the cycle is in `prefix`
+            if not self.in_check(self.side):
+                checking[self.side ^ 1] = False
+            side = self.side
+            for _, in_check in reversed(prefix[earlier + 1 :]):
+                side ^= 1
+                if not in_check:
+                    checking[side ^ 1] = False
+        for move in reversed(moves):
+            self.make(move)
+
+        if checking[0] != checking[1]:
+            return 0 if checking[0] else 1
+        return None
+
+    def history(self, plies):
+        """Returns pairs of the hash and whether the side to move was in check of up to
+        `plies` positions before the current one, oldest first, laid out like `prefix`.
+        """
+
+        moves = []
+        result = []
+        while self.stack and len(result) < plies:
+            moves.append(self.stack[-1][0])
+            self.unmake()
+            result.append((self.hash, self.in_check(self.side)))
+        for move in reversed(moves):
+            self.make(move)
+        result.reverse()
+        older = self.prefix[max(len(self.prefix) - plies + len(result), 0) :]
+        return older + tuple(result)
+
+    def has_legal_move(self):
+        """Returns whether the side to move has any legal move, drops included.
+
+        Follows `Core.legal_moves` but stops at the first legal move found.
+        """
+
+        color = self.side
+        king = self.king_square(color)
+        if king is None:
+            return bool(self.moves())
+
+        them = color ^ 1
+        board = self.squares
+        own = self.occupied[color]
+        occupied = own | self.occupied[them]
+
+        without_king = occupied ^ BIT[king]
+        for to in squares(STEP_ATTACKS[color][KING][king] & ~own):
+            if not self.attackers(to, them, without_king):
+                return True
+
+        checkers = self.attackers(king, them)
+        if checkers & (checkers - 1):
+            return False
+        if checkers:
+            blocks = BETWEEN[king][lsb(checkers)]
+            evasions = blocks | checkers
+        else:
+            blocks = evasions = FULL
+
+        pinned = self.pins(color, king)
+        for frm in squares(own ^ BIT[king]):
+            targets = attacks(color, board[frm] & 15, frm, occupied) & ~own & evasions
+            if frm in pinned:
+                targets &= pinned[frm]
+            if targets:
+                return True
+
+        if not blocks:
+            return False
+        hands = self.hands
+        for kind in range(N_KINDS):
+            if (
+                hands[color * N_KINDS + kind]
+                and self.drop_targets(color, kind) & blocks
+            ):
+                return True
+
+        return False
+
+    def see(self, move):
+        """Static exchange evaluation of `move`.
+
+        Both sides keep recapturing on the destination square with their least valuable
+        attacker, sliders behind the pieces which moved joining in, and each may stop when
+        going on would lose. Captured pieces count with their value in hand.
+
+        Returns:
+            int: material won by the side making the move, in hundredths
+        """
+
+        to = move & 127
+        frm = move >> 7 & 127
+        if frm >= DROP:
+            return 0
+
+        board = self.squares
+        pieces = self.pieces
+        code = board[frm] & 15
+        color = board[frm] >> 4
+        gains = [EXCHANGE_VALUE[board[to] & 15] if board[to] != EMPTY else 0]
+        if move & PROMOTION:
+            gains[0] += VALUE[code | PROMOTED] - VALUE[code]
+            code |= PROMOTED
+
+        occupied = (self.occupied[0] | self.occupied[1]) ^ BIT[frm]
+        side = color ^ 1
+        while True:
+            attackers = self.attackers(to, side, occupied)
+            if not attackers:
+                break
+            for attacker in CAPTURE_ORDER:
+                found = attackers & pieces[side << 4 | attacker]
+                if found:
+                    break
+            # the king may not recapture into an attacked square
+            if attacker == KING and self.attackers(to, side ^ 1, occupied):
+                break
+            gains.append(EXCHANGE_VALUE[code] - gains[-1])
+            code = attacker
+            occupied ^= found & -found
+            side ^= 1
+
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+        return gains[0]
@@ -0,0 +1,73 @@
+# A move is packed into an int: bits 0-6 hold the destination square, bits
+# 7-13 the origin square and bit 14 the promotion flag. Drops use origins
+# from DROP on, one per kind of piece dropped.
+DROP = 81
+PROMOTION = 1 << 14
+
+
+def make_move(frm, to, promote=False):
+    return to | frm << 7 | (PROMOTION if promote else 0)
+
+
+def make_drop(kind, to):
+    return to | (DROP + kind) << 7
+
+
+def to_square(move):
+    return move & 127
+
+
+def from_square(move):
+    return move >> 7 & 127
+
+
+def is_drop(move):
+    return move >> 7 & 127 >= DROP
+
+
+def is_promotion(move):
+    return move & PROMOTION != 0
+
+
+def drop_kind(move):
+    return (move >> 7 & 127) - DROP
+
+
+# Drops in USI notation name the piece by its letter, e.g. "P*5e"
+USI_PIECES = "PLNSGBR"
+
+
+def usi_square(sq):
+    row, col = divmod(sq, 9)
+    return str(9 - col) + chr(ord("a") + row)
+
+
+def parse_usi_square(text):
+    if len(text) != 2 or text[0] not in "123456789" or text[1] not in "abcdefghi":
+        raise ValueError(f"malformed USI square {text!r}")
+    return (ord(text[1]) - ord("a")) * 9 + 9 - int(text[0])
+
+
+def to_usi(move):
+    """Returns `move` in USI notation, e.g. "7g7f", "8h2b+" or "P*5e"."""
+
+    if is_drop(move):
+        return USI_PIECES[drop_kind(move)] + "*" + usi_square(to_square(move))
+    text = usi_square(from_square(move)) + usi_square(to_square(move))
+    return text + "+" if is_promotion(move) else text
+
+
+def from_usi(text):
+    """Parses move in USI notation, raises ValueError if it is malformed."""
+
+    try:
+        if text[1] == "*":
+            return make_drop(USI_PIECES.index(text[0]), parse_usi_square(text[2:4]))
+        move = make_move(parse_usi_square(text[0:2]), parse_usi_square(text[2:4]))
+    except (IndexError, ValueError):
+        raise ValueError(f"malformed USI move {text!r}")
+    if text[4:] == "+":
+        return move | PROMOTION
+    if text[4:]:
+        raise ValueError(f"malformed USI move {text!r}")
+    return move
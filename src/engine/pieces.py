@@ -24,86 +24,107 @@ pieces_dict = {
     "K": 9,
 }
 
-
-dragonMoves = (
-    [(i, 0) for i in range(8)]
-    + [(-i, 0) for i in range(8)]
-    + [(0, i) for i in range(8)]
-    + [(0, -i) for i in range(8)]
-    + [(1, 1), (-1, 1), (-1, -1), (1, -1)]
-)
-
-horseMoves = (
-    [(i, i) for i in range(8)]
-    + [(-i, -i) for i in range(8)]
-    + [(-i, i) for i in range(8)]
-    + [(i, -i) for i in range(8)]
-    + [(1, 0), (0, 1), (-1, 0), (0, -1)]
+# Compact piece codes used by the engine core. The low three bits hold the
+# base kind, PROMOTED is or-ed in for promoted pieces.
+PAWN = 0
+LANCE = 1
+KNIGHT = 2
+SILVER = 3
+GOLD = 4
+BISHOP = 5
+ROOK = 6
+KING = 7
+PROMOTED = 8
+
+# Tables indexed by piece code, codes of promoted golds and kings are unused.
+# NAMES[code] - sprite name of a piece, promoted minor pieces look like golds
+NAMES = (
+    "P",
+    "L",
+    "N",
+    "S",
+    "G",
+    "B",
+    "R",
+    "K",
+    "G",
+    "G",
+    "G",
+    "G",
+    None,
+    "H",
+    "D",
+    None,
 )
-goldenMoves = [(1, 0), (1, 1), (1, -1), (0, 1), (0, -1), (-1, 0)]
 
-lanceMoves = [(i, 0) for i in range(8)]
+# VALUES[code] - value of a piece on the board, HAND_VALUES[kind] - in hand
+VALUES = (1.00, 4.30, 4.50, 6.40, 6.90, 8.90, 10.40, 100_000)
+VALUES += (4.20, 6.30, 6.40, 6.70, 0.0, 11.50, 13.00, 0.0)
+HAND_VALUES = (1.15, 4.80, 5.10, 7.20, 7.80, 11.10, 12.70)
 
-knightMoves = [(2, 1), (2, -1)]
+# Codes which may promote
+PROMOTABLE = tuple(
+    code in (PAWN, LANCE, KNIGHT, SILVER, BISHOP, ROOK) for code in range(16)
+)
 
-silverMoves = [(1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
 
-bishopMoves = (
-    [(i, i) for i in range(8)]
-    + [(-i, -i) for i in range(8)]
-    + [(-i, i) for i in range(8)]
-    + [(i, -i) for i in range(8)]
-)
+class Piece:
+    __slots__ = ("code", "color", "row", "col")
 
-rookMoves = (
-    [(i, 0) for i in range(8)]
-    + [(-i, 0) for i in range(8)]
-    + [(0, i) for i in range(8)]
-    + [(0, -i) for i in range(8)]
-)
+    def __init__(self, code, color, pos=(None, None)):
+        """Initializes a view of a piece for the GUI, the engine itself only works with
+        piece codes. Everything else about the piece is looked up by its code.
 
-kingMoves = [
-    (0, 1),
-    (1, 0),
-    (0, -1),
-    (-1, 0),
-    (1, 1),
-    (-1, -1),
-    (1, -1),
-    (-1, 1),
-]
+        Args:
+            code (int): piece code, e.g. `ROOK | PROMOTED`
 
-pawnMoves = [(1, 0)]
+            color (COLOR): owner of the piece
 
+            pos (tuple[int, int], optional): row and column. Defaults to none, i.e. in hand.
+        """
 
-class Piece:
-    def __init__(self, pos, color, promoted=False):
-        self.value_in_hand = None
-        self.value = None
-        self.name = None
+        self.code = code
+        self.color = color
         self.row = pos[0]
         self.col = pos[1]
-        self.color = color
-        self.promoted = promoted
+
+    @property
+    def kind(self):
+        return self.code & 7
+
+    @property
+    def promoted(self):
+        return bool(self.code & PROMOTED)
+
+    @property
+    def name(self):
+        return NAMES[self.code]
+
+    @property
+    def value(self):
+        return VALUES[self.code]
 
     def place(self, new_position):
         self.row = new_position[0]
         self.col = new_position[1]
 
     def can_promote(self, row):
-        if self.name in {"G", "D", "H", "K"} or self.promoted:
+        if not PROMOTABLE[self.code]:
             return False
-        elif (self.color == COLOR.WHITE and row > 5) or (
-            self.color == COLOR.BLACK and row < 3
-        ):
-            return True
+        # moves into, out of or within the promotion zone may promote
+        for r in (row, self.row):
+            if (self.color == COLOR.WHITE and r > 5) or (
+                self.color == COLOR.BLACK and r < 3
+            ):
+                return True
         return False
 
     def promote(self):
-        pass
+        if PROMOTABLE[self.code]:
+            self.code |= PROMOTED
 
     def degrade(self):
-        pass
+        self.code &= ~PROMOTED
 
     def pos(self):
         return self.row, self.col
@@ -111,146 +132,5 @@ class Piece:
     def __lt__(self, other):
         return self.value < other.value
 
-
-class Pawn(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "P"
-        self.moves = pawnMoves
-        self.value = 1.00
-        self.value_in_hand = 1.15
-
-    def promote(self):
-        self.name = "G"
-        self.moves = goldenMoves
-        self.value = 4.20
-        self.promoted = True
-
-    def degrade(self):
-        self.value = 1.00
-        self.moves = pawnMoves
-        self.name = "P"
-        self.promoted = False
-
-
-class King(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "K"
-        self.moves = kingMoves
-        self.value = 100_000
-        self.value_in_hand = 100_000
-
-
-class Rook(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "R"
-        self.moves = rookMoves
-        self.value = 10.40
-        self.value_in_hand = 12.70
-
-    def promote(self):
-        self.moves = dragonMoves
-        self.value = 13.00
-        self.promoted = True
-        self.name = "D"
-
-    def degrade(self):
-        self.value = 10.40
-        self.moves = rookMoves
-        self.name = "R"
-        self.promoted = False
-
-
-class Bishop(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "B"
-        self.moves = bishopMoves
-        self.value = 8.90
-        self.value_in_hand = 11.10
-
-    def promote(self):
-        self.moves = horseMoves
-        self.value = 11.50
-        self.promoted = True
-        self.name = "H"
-
-    def degrade(self):
-        self.value = 8.90
-        self.moves = bishopMoves
-        self.name = "B"
-        self.promoted = False
-
-
-class Gold(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "G"
-        self.moves = goldenMoves
-        self.value = 6.90
-        self.value_in_hand = 7.80
-
-
-class Silver(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "S"
-        self.moves = silverMoves
-        self.value = 6.40
-        self.value_in_hand = 7.20
-
-    def promote(self):
-        self.name = "G"
-        self.moves = goldenMoves
-        self.value = 6.70
-        self.promoted = True
-
-    def degrade(self):
-        self.value = 6.40
-        self.moves = silverMoves
-        self.name = "S"
-        self.promoted = False
-
-
-class Knight(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "N"
-        self.moves = knightMoves
-        self.value = 4.50
-        self.value_in_hand = 5.10
-
-    def promote(self):
-        self.name = "G"
-        self.moves = goldenMoves
-        self.value = 6.40
-        self.promoted = True
-
-    def degrade(self):
-        self.value = 4.50
-        self.moves = knightMoves
-        self.name = "N"
-        self.promoted = False
-
-
-class Lance(Piece):
-    def __init__(self, pos, color, promoted=False):
-        super().__init__(pos, color, promoted)
-        self.name = "L"
-        self.moves = lanceMoves
-        self.value = 4.30
-        self.value_in_hand = 4.80
-
-    def promote(self):
-        self.name = "G"
-        self.moves = goldenMoves
-        self.value = 6.30
-        self.promoted = True
-
-    def degrade(self):
-        self.value = 4.30
-        self.moves = lanceMoves
-        self.name = "L"
-        self.promoted = False
+    def __repr__(self):
+        return f"Piece({self.name}, {self.color.name}, {self.pos()})"
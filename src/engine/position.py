@@ -0,0 +1,89 @@
+import numpy as np
+
+from typing import NamedTuple
+
+from engine.bitboard import N_SQUARES
+from engine.core import N_KINDS, Core
+
+# earlier positions kept in a snapshot, so that a search started from it still sees
+# repetitions of recent positions
+HISTORY_PLIES = 32
+
+# bytes of a serialized snapshot before its history
+HEADER_SIZE = N_SQUARES + 2 * N_KINDS + 1 + 8
+
+
+class Position(NamedTuple):
+    """Immutable snapshot of a position, cheap to pickle or to send through a pipe or shared
+    memory as bytes (see `Position.to_bytes`).
+
+    `squares` and `hands` are laid out like `Core.squares` and `Core.hands`, `side` is the
+    color to move and `history` holds hashes of up to `HISTORY_PLIES` positions before it,
+    oldest first. Bit `i` of `checks` is set if the side to move was in check in position
+    `history[i]`, so that perpetual checks through it are told apart from other repetitions.
+    """
+
+    squares: bytes
+    hands: bytes
+    side: int
+    history: tuple = ()
+    checks: int = 0
+
+    @classmethod
+    def from_core(cls, core):
+        history = core.history(HISTORY_PLIES)
+        checks = 0
+        for i, (_, in_check) in enumerate(history):
+            checks |= in_check << i
+        return cls(
+            bytes(core.squares),
+            bytes(core.hands),
+            core.side,
+            tuple(key for key, _ in history),
+            checks,
+        )
+
+    def to_core(self):
+        """Returns a new `Core` holding the position, without a piece-square table set.
+
+        Moves before the snapshot can't be taken back, but repetitions of the positions in
+        `history` are counted.
+        """
+
+        core = Core()
+        core.set_position(bytearray(self.squares), bytearray(self.hands), self.side)
+        core.prefix = tuple(
+            (key, bool(self.checks >> i & 1)) for i, key in enumerate(self.history)
+        )
+        for key in self.history:
+            core.seen[key] = core.seen.get(key, 0) + 1
+        return core
+
+    def to_bytes(self):
+        """Returns the snapshot packed into `HEADER_SIZE` bytes and 8 per position of history."""
+
+        history = np.array(self.history, dtype=np.uint64)
+        checks = self.checks.to_bytes(8, "little")
+        return (
+            self.squares + self.hands + bytes((self.side,)) + checks + history.tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Returns the snapshot packed by `Position.to_bytes`.
+
+        Raises:
+            ValueError: `data` has the wrong size
+        """
+
+        if len(data) < HEADER_SIZE or (len(data) - HEADER_SIZE) % 8:
+            raise ValueError(f"malformed position of {len(data)} bytes")
+        history = np.frombuffer(data, dtype=np.uint64, offset=HEADER_SIZE)
+        side = N_SQUARES + 2 * N_KINDS
+        return cls(
+            bytes(data[:N_SQUARES]),
+            bytes(data[N_SQUARES:side]),
+            data[side],
+            tuple(int(key) for key in history),
+            int.from_bytes(data[side + 1 : HEADER_SIZE], "little"),
+        )
@@ -0,0 +1,160 @@
+from engine.bitboard import SIZE
+from engine.core import EMPTY, N_KINDS, PROMOTABLE, Core
+from engine.pieces import KING, PROMOTED
+
+# Positions in SFEN, e.g. the start position below. Ranks are listed from the
+# top (row 0) and files from 9 to 1 (column 0 to 8); uppercase letters are
+# black pieces, a "+" prefix marks promoted ones.
+START_SFEN = "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1"
+
+# SFEN_PIECES[code] - letter of a black piece
+SFEN_PIECES = "PLNSGBRK"
+
+# order in which pieces in hand are listed
+HAND_ORDER = "RBGSNLP"
+
+
+def _letter_tables():
+    letters = [""] * (EMPTY + 1)
+    # squares are parsed by translating each rank to a character per square whose
+    # code is the colored piece, promoted pieces are first replaced by such codes
+    translation = {ord(digit): chr(EMPTY) * int(digit) for digit in "123456789"}
+    promoted = []
+    for code, letter in enumerate(SFEN_PIECES):
+        for color, char in ((0, letter), (1, letter.lower())):
+            piece = color << 4 | code
+            letters[piece] = char
+            translation[ord(char)] = chr(piece)
+            if PROMOTABLE[code]:
+                letters[piece | PROMOTED] = "+" + char
+                promoted.append(("+" + char, chr(piece | PROMOTED)))
+    return tuple(letters), translation, tuple(promoted)
+
+
+# SFEN_LETTERS[piece] - letters of a colored piece, e.g. "+p" for a white tokin
+SFEN_LETTERS, SQUARE_TRANSLATION, PROMOTED_CHARACTERS = _letter_tables()
+
+# characters of valid squares after translation
+SQUARE_CHARACTERS = chr(EMPTY) + "".join(
+    chr(piece) for piece, letters in enumerate(SFEN_LETTERS) if letters
+)
+
+# HAND_INDEX[letter] - index of pieces in hand in `Core.hands`
+HAND_INDEX = {
+    char: color * N_KINDS + SFEN_PIECES.index(letter)
+    for letter in HAND_ORDER
+    for color, char in ((0, letter), (1, letter.lower()))
+}
+
+# PIECE_COUNTS[kind] - number of pieces of a kind in the game, promoted or not
+PIECE_COUNTS = (18, 4, 4, 4, 4, 2, 2)
+
+# translates squares to the kind of the piece on them, promoted pieces to their base kind
+# and empty squares to the king, which is counted separately
+KIND_TRANSLATION = bytes(piece & 7 if piece < EMPTY else KING for piece in range(256))
+
+# (index in `Core.hands`, letter) in the order of HAND_ORDER, black first
+HAND_LETTERS = tuple(
+    (color * N_KINDS + SFEN_PIECES.index(letter), letter.lower() if color else letter)
+    for color in (0, 1)
+    for letter in HAND_ORDER
+)
+
+
+def parse_sfen(text, problem=False):
+    """Returns a `Core` holding the position given in SFEN.
+
+    Args:
+        text (str): position
+
+        problem (bool, optional): accept a mate problem, in which the side to move may have
+        no king. Defaults to False.
+
+    Raises:
+        ValueError: `text` is not a valid SFEN
+    """
+
+    fields = text.split()
+    if len(fields) not in (3, 4):
+        raise ValueError(f"malformed SFEN {text!r}")
+    board, side, hand = fields[:3]
+    ranks = board.split("/")
+    # translated squares are control characters, which may not appear in the input
+    if len(ranks) != SIZE or side not in ("b", "w") or not board.isprintable():
+        raise ValueError(f"malformed SFEN {text!r}")
+    if len(fields) == 4 and not (fields[3].isdecimal() and int(fields[3]) > 0):
+        raise ValueError(f"malformed SFEN {text!r}")
+
+    if "+" in board:
+        for token, char in PROMOTED_CHARACTERS:
+            board = board.replace(token, char)
+        ranks = board.split("/")
+    ranks = [rank.translate(SQUARE_TRANSLATION) for rank in ranks]
+    for rank in ranks:
+        if len(rank) != SIZE or rank.strip(SQUARE_CHARACTERS):
+            raise ValueError(f"malformed SFEN {text!r}")
+    squares = bytearray("".join(ranks), "latin-1")
+
+    hands = bytearray(2 * N_KINDS)
+    if hand != "-":
+        count = None
+        for char in hand:
+            if "0" <= char <= "9":
+                count = 10 * (count or 0) + ord(char) - 48
+            elif char in HAND_INDEX and count != 0:
+                index = HAND_INDEX[char]
+                count = hands[index] + (count or 1)
+                if count > PIECE_COUNTS[index % N_KINDS]:
+                    raise ValueError(f"malformed SFEN {text!r}")
+                hands[index] = count
+                count = None
+            else:
+                raise ValueError(f"malformed SFEN {text!r}")
+        if count is not None:
+            raise ValueError(f"malformed SFEN {text!r}")
+
+    # mate problems leave out the king of the side to move
+    mover = int(side == "w")
+    kings = squares.count(mover << 4 | KING)
+    if kings != 1 and not (problem and kings == 0):
+        raise ValueError(f"malformed SFEN {text!r}")
+    if squares.count((mover ^ 1) << 4 | KING) != 1:
+        raise ValueError(f"malformed SFEN {text!r}")
+    # a position with more pieces than the game has would overflow the hands on captures
+    kinds = squares.translate(KIND_TRANSLATION)
+    for kind, limit in enumerate(PIECE_COUNTS):
+        if kinds.count(kind) + hands[kind] + hands[N_KINDS + kind] > limit:
+            raise ValueError(f"malformed SFEN {text!r}")
+
+    core = Core()
+    core.set_position(squares, hands, mover)
+    return core
+
+
+def to_sfen(core, ply=1):
+    """Returns position of `core` in SFEN, `ply` is the move number it ends with."""
+
+    board = core.squares
+    ranks = []
+    for start in range(0, SIZE * SIZE, SIZE):
+        rank = ""
+        empty = 0
+        for piece in board[start : start + SIZE]:
+            if piece == EMPTY:
+                empty += 1
+            else:
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += SFEN_LETTERS[piece]
+        ranks.append(rank + str(empty) if empty else rank)
+
+    hands = core.hands
+    hand = ""
+    for index, letter in HAND_LETTERS:
+        count = hands[index]
+        if count:
+            hand += str(count) + letter if count > 1 else letter
+
+    side = "w" if core.side else "b"
+    return f"{'/'.join(ranks)} {side} {hand or '-'} {ply}"
@@ -0,0 +1,308 @@
+import numpy as np
+import time
+
+from engine.bitboard import STEP_ATTACKS, squares
+from engine.moves import DROP
+from engine.pieces import KING
+
+# Proof and disproof numbers are kept as (phi, delta) of the side to move: at
+# attacker nodes phi is the proof number and delta the disproof number, at
+# defender nodes the other way round. A node is solved when either is 0.
+INFINITE = (1 << 31) - 1
+
+# longest mate looked for by increasing length once a mate is found, and the
+# nodes this may take beyond those spent on finding it
+SHORT_MATE = 7
+SHORTEN_NODES = 1_000
+
+ENTRY = np.dtype([("key", np.uint64), ("phi", np.uint32), ("delta", np.uint32)])
+
+
+class SolverLimit(Exception):
+    pass
+
+
+class DfpnTable:
+    def __init__(self, size_mb=8):
+        """Initializes a fixed-size table of proof and disproof numbers.
+
+        Buckets hold two entries. Solved entries are kept over unsolved ones, so that the
+        mating sequence can be read back from the table after a search.
+
+        Args:
+            size_mb (float, optional): memory budget in megabytes. Defaults to 8.
+        """
+
+        n_buckets = max(1, int(size_mb * 2**20) // (2 * ENTRY.itemsize))
+        self.table = np.zeros((n_buckets, 2), dtype=ENTRY)
+        self.n_buckets = n_buckets
+        self.keys = self.table["key"]
+        self.phis = self.table["phi"]
+        self.deltas = self.table["delta"]
+
+    def probe(self, key):
+        """Returns (phi, delta) stored for position with hash `key`, (1, 1) if there is none."""
+
+        index = key % self.n_buckets
+        for slot in (0, 1):
+            if self.keys[index, slot] == key and self.phis[index, slot]:
+                return int(self.phis[index, slot]) - 1, int(self.deltas[index, slot])
+        return 1, 1
+
+    def store(self, key, phi, delta):
+        index = key % self.n_buckets
+        if self.keys[index, 0] == key:
+            slot = 0
+        elif self.keys[index, 1] == key:
+            slot = 1
+        elif self.__replaceable(index, 0):
+            slot = 0
+        else:
+            slot = 1
+        self.keys[index, slot] = key
+        # phi is stored plus one, so that a zero marks an empty entry
+        self.phis[index, slot] = phi + 1
+        self.deltas[index, slot] = delta
+
+    def __replaceable(self, index, slot):
+        # empty or not solved
+        phi = self.phis[index, slot]
+        return phi == 0 or phi != 1 and self.deltas[index, slot] != 0
+
+    def clear(self):
+        self.table.fill(0)
+
+
+class TsumeSolver:
+    def __init__(self, table_size_mb=8, max_nodes=200_000, time_limit=None, max_ply=31):
+        """Initializes a mate solver running depth-first proof-number search (df-pn).
+
+        The attacker must check with every move, the defender answers with any legal move.
+        Repetitions count as a failure of the attacker, as perpetual check loses in shogi.
+
+        Args:
+            table_size_mb (float, optional): size of the proof number table. Defaults to 8.
+
+            max_nodes (int, optional): most nodes a single `solve` may visit. Defaults to 200_000.
+
+            time_limit (float, optional): most seconds a single `solve` may take. Defaults to
+            no limit.
+
+            max_ply (int, optional): longest mate looked for. Defaults to 31.
+        """
+
+        self.table = DfpnTable(table_size_mb)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.max_ply = max_ply
+        self.nodes = 0
+        self.node_limit = max_nodes
+        self.deadline = None
+        self.limit = max_ply
+        self.core = None
+
+    def solve(self, core):
+        """Looks for a forced mate by the side to move of `core`.
+
+        Once a mate is found, shorter ones of up to `SHORT_MATE` plies are looked for by
+        increasing length while the limits allow, so short mates come out shortest.
+
+        Args:
+            core (Core): position, it is searched in place and left unchanged
+
+        Returns:
+            list | None: moves of the mating sequence (see `engine.moves`), None if there is
+            no mate within `max_ply` or the search hit its node or time limit
+        """
+
+        self.core = core
+        self.nodes = 0
+        self.node_limit = self.max_nodes
+        self.deadline = None
+        if self.time_limit is not None:
+            self.deadline = time.monotonic() + self.time_limit
+
+        try:
+            mate = self.__search(self.max_ply)
+        except SolverLimit:
+            return None
+        if mate is None:
+            return None
+
+        # shortening may take as many nodes again as finding the mate did
+        self.node_limit = min(self.max_nodes, 2 * self.nodes + SHORTEN_NODES)
+        for limit in range(1, min(len(mate) - 2, SHORT_MATE) + 1, 2):
+            try:
+                shorter = self.__search(limit)
+            except SolverLimit:
+                break
+            if shorter is not None:
+                return shorter
+        return mate
+
+    def __search(self, limit):
+        """Runs df-pn from the root for mates of at most `limit` plies.
+
+        Returns:
+            list | None: mating sequence or None if there is no mate
+
+        Raises:
+            SolverLimit: node or time limit was hit, the position is restored
+        """
+
+        # disproofs only hold for the ply limit they were found with
+        self.table.clear()
+        self.limit = limit
+        stack_size = len(self.core.stack)
+        try:
+            phi, delta = self.__mid(INFINITE, INFINITE, 0, set())
+        except SolverLimit:
+            while len(self.core.stack) > stack_size:
+                self.core.unmake()
+            raise
+        return self.__mating_sequence() if phi == 0 else None
+
+    def __children(self, attacker):
+        """Returns (move, hash after the move) pairs of the moves searched at a node."""
+
+        core = self.core
+        if not attacker:
+            moves = core.legal_moves()
+        elif core.in_check(core.side):
+            moves = [move for move in core.legal_moves() if self.__gives_check(move)]
+        else:
+            # drops are legal when not in check, only checking ones are generated
+            moves = [
+                move
+                for move in core.legal_moves()
+                if move >> 7 & 127 < DROP and self.__gives_check(move)
+            ]
+            moves += core.checking_drops()
+
+        children = []
+        for move in moves:
+            core.make(move)
+            children.append((move, core.hash))
+            core.unmake()
+        return children
+
+    def __gives_check(self, move):
+        core = self.core
+        core.make(move)
+        check = core.in_check(core.side)
+        core.unmake()
+        return check
+
+    def __mid(self, th_phi, th_delta, ply, path):
+        """Expands the current node until its phi or delta reaches the threshold.
+
+        Returns:
+            tuple: (phi, delta) of the node
+        """
+
+        self.nodes += 1
+        if self.nodes > self.node_limit or (
+            self.deadline is not None
+            and self.nodes % 256 == 0
+            and time.monotonic() > self.deadline
+        ):
+            raise SolverLimit
+
+        core = self.core
+        key = core.hash
+        attacker = ply % 2 == 0
+        if attacker and ply >= self.limit:
+            self.table.store(key, INFINITE, 0)
+            return INFINITE, 0
+
+        children = self.__children(attacker)
+        if not children:
+            # the attacker has no check or the defender no move, the side to move lost
+            self.table.store(key, INFINITE, 0)
+            return INFINITE, 0
+
+        path.add(key)
+        while True:
+            phi = second = INFINITE
+            delta = 0
+            for move, child_key in children:
+                if child_key in path:
+                    # a repetition fails for the attacker
+                    child_phi, child_delta = (
+                        (0, INFINITE) if attacker else (INFINITE, 0)
+                    )
+                else:
+                    child_phi, child_delta = self.table.probe(child_key)
+                delta = min(delta + child_phi, INFINITE)
+                if child_delta < phi:
+                    second = phi
+                    phi = child_delta
+                    best, best_phi = move, child_phi
+                elif child_delta < second:
+                    second = child_delta
+
+            if phi >= th_phi or delta >= th_delta:
+                break
+
+            core.make(best)
+            self.__mid(
+                min(th_delta - delta + best_phi, INFINITE),
+                min(th_phi, second + 1),
+                ply + 1,
+                path,
+            )
+            core.unmake()
+
+        path.discard(key)
+        self.table.store(key, phi, delta)
+        return phi, delta
+
+    def __mating_sequence(self):
+        """Reads the proven mate back from the table.
+
+        Returns:
+            list | None: moves to mate, None if entries of the proof were overwritten
+        """
+
+        core = self.core
+        sequence = []
+        seen = set()
+        while len(sequence) <= self.limit:
+            attacker = len(sequence) % 2 == 0
+            children = self.__children(attacker)
+            if not children:
+                break
+            seen.add(core.hash)
+            chosen = None
+            for move, child_key in children:
+                if child_key in seen:
+                    continue
+                child_phi, child_delta = self.table.probe(child_key)
+                if attacker and child_delta == 0:
+                    chosen = move
+                    break
+                if not attacker and child_phi == 0:
+                    chosen = move
+            if chosen is None:
+                break
+            core.make(chosen)
+            sequence.append(chosen)
+
+        mated = len(sequence) % 2 == 1 and not core.has_legal_move()
+        for _ in sequence:
+            core.unmake()
+        return sequence if mated else None
+
+
+def king_exposed(core, color):
+    """Tells whether the king of `color` is weak enough for a mate search: at least two
+    squares around it are attacked by the other side."""
+
+    king = core.king_square(color)
+    if king is None:
+        return False
+    attacked = 0
+    for sq in squares(STEP_ATTACKS[color][KING][king]):
+        if core.attackers(sq, color ^ 1):
+            attacked += 1
+    return attacked >= 2
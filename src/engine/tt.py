@@ -0,0 +1,126 @@
+import numpy as np
+
+# Kinds of bound a stored score is
+EMPTY = 0
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+ENTRY = np.dtype(
+    [
+        ("key", np.uint64),
+        ("score", np.int32),
+        ("move", np.uint32),
+        ("depth", np.int8),
+        ("bound", np.uint8),
+        ("generation", np.uint8),
+    ]
+)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        """Initializes a fixed-size transposition table.
+
+        The table is a preallocated array of two-entry buckets indexed by the position hash.
+        The first entry of a bucket is depth-preferred, i.e. replaced only by searches at
+        least as deep or once it is left from an earlier search (see `new_search`), the
+        second one is always replaced.
+
+        Args:
+            size_mb (float, optional): memory budget in megabytes. Defaults to 16.
+        """
+
+        n_buckets = max(1, int(size_mb * 2**20) // (2 * ENTRY.itemsize))
+        self.table = np.zeros((n_buckets, 2), dtype=ENTRY)
+        self.n_buckets = n_buckets
+
+        # views of single fields, indexing them is much cheaper than building records
+        self.keys = self.table["key"]
+        self.scores = self.table["score"]
+        self.moves = self.table["move"]
+        self.depths = self.table["depth"]
+        self.bounds = self.table["bound"]
+        self.generations = self.table["generation"]
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def probe(self, key):
+        """Looks up position with hash `key`.
+
+        Args:
+            key (int): position hash
+
+        Returns:
+            tuple | None: (depth, score, bound, move) of the stored entry or None if there is none
+        """
+
+        index = key % self.n_buckets
+        for slot in (0, 1):
+            if self.keys[index, slot] == key and self.bounds[index, slot] != EMPTY:
+                self.hits += 1
+                # an entry still in use is kept like one stored by this search
+                self.generations[index, slot] = self.generation
+                return (
+                    int(self.depths[index, slot]),
+                    int(self.scores[index, slot]),
+                    int(self.bounds[index, slot]),
+                    int(self.moves[index, slot]),
+                )
+
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """Stores search result of position with hash `key`.
+
+        Args:
+            key (int): position hash
+
+            depth (int): depth the position was searched to
+
+            score (int): score of the position
+
+            bound (int): one of `EXACT`, `LOWER` or `UPPER`
+
+            move (int): best move found (see `engine.moves`), 0 if none
+        """
+
+        index = key % self.n_buckets
+        if (
+            self.keys[index, 0] == key
+            or depth >= self.depths[index, 0]
+            or self.generations[index, 0] != self.generation
+        ):
+            slot = 0
+        else:
+            slot = 1
+
+        if self.bounds[index, slot] != EMPTY and self.keys[index, slot] != key:
+            self.overwrites += 1
+
+        self.keys[index, slot] = key
+        self.scores[index, slot] = score
+        self.moves[index, slot] = move
+        self.depths[index, slot] = depth
+        self.bounds[index, slot] = bound
+        self.generations[index, slot] = self.generation
+
+    def new_search(self):
+        """Starts a new generation of entries, those of earlier searches may be replaced by
+        shallower ones."""
+
+        self.generation = (self.generation + 1) % 256
+
+    def clear(self):
+        self.table.fill(0)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "overwrites": self.overwrites}
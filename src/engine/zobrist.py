@@ -0,0 +1,23 @@
+import random
+
+# Keys are drawn from a fixed seed, so that hashes are the same in every
+# process and can be stored on disk.
+_random = random.Random(0x5EED5)
+
+
+def _key():
+    return _random.getrandbits(64)
+
+
+MAX_IN_HAND = 18
+
+# PIECE_KEYS[piece][sq] - colored piece standing on a square
+PIECE_KEYS = tuple(tuple(_key() for _ in range(81)) for _ in range(32))
+
+# HAND_KEYS[color * 7 + kind][count] - count of a kind in a color's hand
+HAND_KEYS = tuple(
+    tuple(_key() if count else 0 for count in range(MAX_IN_HAND + 1)) for _ in range(14)
+)
+
+# SIDE_KEY is mixed in when white is to move
+SIDE_KEY = _key()
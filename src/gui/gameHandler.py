@@ -6,9 +6,10 @@ import engine.board as board
 import engine.pieces as pieces
 
 from random import randint
+from engine.bot import SearchWorker
 from engine.pieces import COLOR
 from gui.saveController import SaveController
-from gui.sprite import Sprite
+from gui.sprite import SpriteAtlas
 from gui.abstractHandler import (
     TextBox,
     Button,
@@ -19,18 +20,25 @@ from gui.abstractHandler import (
     RGB_WHITE,
 )
 
+# the drop menu shows a square per piece in hand, numbered row by row
+DROP_MENU_COLUMNS = 6
+# HAND_SLOTS[kind] - first square of the pieces of `kind`, there is room for all of them
+HAND_SLOTS = (0, 18, 22, 26, 30, 34, 36)
+
 
 class Renderer(AbstractRenderer):
     def __init__(self, screen):
         self.screen: pygame.surface = screen
 
-        self.pieces = {
-            name: (
-                Sprite(np.load(SPRITE_PATH + name + "0.npy"), 100),
-                Sprite(np.load(SPRITE_PATH + name + "1.npy"), 100),
-            )
-            for name in pieces.pieces_dict
-        }
+        self.atlas = SpriteAtlas(
+            {
+                (name, color): np.load(SPRITE_PATH + name + str(color) + ".npy")
+                for name in pieces.pieces_dict
+                for color in (0, 1)
+            }
+        )
+        # surfaces of the pieces by name and color value
+        self.pieces = self.atlas.render(100)
         self.board = None
         self.clock = [None, None]
         self.bg_color = RGB_BLACK
@@ -38,6 +46,7 @@ class Renderer(AbstractRenderer):
 
         self.player_text = [None, None]
         self.end_text = None
+        self.thinking_text = None
 
         self.quit_button = None
         self.quit_button_hover = None
@@ -46,10 +55,7 @@ class Renderer(AbstractRenderer):
         self.drop_button_hover = [None, None]
 
     def render_pieces(self, size):
-        for key in self.pieces.keys():
-            sprite1, sprite2 = self.pieces[key]
-            sprite1.render(size)
-            sprite2.render(size)
+        self.pieces = self.atlas.render(size)
 
     def render_board(self, square_size, n_squares=9):
         BOARD_COLOR = (234, 158, 34)
@@ -158,7 +164,7 @@ class Renderer(AbstractRenderer):
 
     def render_end_text(self, square_size, who_won):
         self.end_text = TextBox(
-            who_won + " wins!",
+            "Draw!" if who_won is None else who_won + " wins!",
             font_size=square_size / 2,
             font_color=RGB_BLACK,
             bg_color=RGB_WHITE,
@@ -167,11 +173,22 @@ class Renderer(AbstractRenderer):
             border=False,
         ).render_text()
 
+    def render_thinking_text(self, square_size):
+        self.thinking_text = TextBox(
+            "Thinking...",
+            font_size=square_size / 2,
+            font_color=RGB_WHITE,
+            bg_color=RGB_BLACK,
+            width=3 * square_size,
+            height=square_size / 2,
+            border=False,
+        ).render_text()
+
     def draw_bg(self):
         self.screen.fill(self.bg_color)
 
     def draw_piece(self, piece_name, piece_color, pos):
-        self.screen.blit(self.pieces[piece_name][piece_color.value].surface, pos)
+        self.screen.blit(self.pieces[piece_name, piece_color.value], pos)
 
     def draw_board(self, pos):
         self.screen.blit(self.board, pos)
@@ -213,6 +230,9 @@ class Renderer(AbstractRenderer):
     def draw_end_text(self, pos):
         self.screen.blit(self.end_text, pos)
 
+    def draw_thinking_text(self, pos):
+        self.screen.blit(self.thinking_text, pos)
+
 
 class Handler(AbstractHandler):
     def __init__(self, window, who_starts, max_time, is_pvp):
@@ -245,6 +265,9 @@ class Handler(AbstractHandler):
         self.ended = False
         self.who_won: str = ""
 
+        # Bot search running in the background
+        self.bot_search: SearchWorker = None
+
         self.drop_menu_enabled_1 = False
         self.drop_menu_enabled_2 = False
 
@@ -342,13 +365,54 @@ class Handler(AbstractHandler):
         self.renderer.render_drop_button(self.square_size)
         self.renderer.render_player_text(self.square_size)
         self.renderer.render_end_text(self.square_size, self.who_won)
+        self.renderer.render_thinking_text(self.square_size)
         self.renderer.render_drop_menu(self.square_size)
 
-    def __end_game(self):
+    def __start_bot(self):
+        self.bot_search = SearchWorker(self.board.bot, self.board.turn_color)
+
+    def __poll_bot(self):
+        """Plays the bot's move once its background search has finished."""
+
+        if self.bot_search is None or not self.bot_search.finished():
+            return
+
+        result = self.bot_search.result
+        self.bot_search = None
+
+        # the bot has no legal move left
+        if result is None:
+            self.__end_game()
+            return
+
+        self.board.play(result[1])
+        self.board.end_turn()
+        self.__check_end()
+
+    def __cancel_bot(self):
+        if self.bot_search is not None:
+            self.bot_search.cancel()
+            self.bot_search = None
+
+    def __check_end(self):
+        """Ends the game if the move just played mated or repeated the position for the
+        fourth time (sennichite)."""
+
+        if self.board.is_checkmate(self.board.turn_color):
+            self.__end_game()
+        elif self.board.is_sennichite():
+            loser = self.board.perpetual_checker()
+            self.__end_game(loser, draw=loser is None)
+
+    def __end_game(self, loser=None, draw=False):
+        """Ends the game lost by `loser`, by default the side to move, or drawn."""
+
         self.ended = True
-        self.who_won = (
-            "Player 1" if self.board.turn_color == COLOR.WHITE else "Player 2"
-        )
+        if draw:
+            self.who_won = None
+        else:
+            loser = loser or self.board.turn_color
+            self.who_won = "Player 1" if loser == COLOR.WHITE else "Player 2"
 
         self.drop_menu_enabled_1 = False
         self.drop_menu_enabled_2 = False
@@ -360,7 +424,9 @@ class Handler(AbstractHandler):
 
         self.renderer.render_end_text(self.square_size, self.who_won)
 
-        if not self.is_pvp and self.who_won == "Player 1":
+        if not self.is_pvp and self.who_won is None:
+            SaveController().update("Draw")
+        elif not self.is_pvp and self.who_won == "Player 1":
             SaveController().update("Win")
         elif not self.is_pvp:
             SaveController().update("Loss")
@@ -389,36 +455,8 @@ class Handler(AbstractHandler):
             )
             return p and q
 
-        def __get_position_in_dropmenu(color: COLOR, key):
-            d = 3 if int(key[-1]) == color.value else 0
-            match key[0]:
-                case "P":
-                    x, y = int(key[1]) // 3, int(key[1]) % 3
-                case "R":
-                    x, y = 3, 0
-                case "B":
-                    x, y = 3, 1
-                case "L":
-                    if key[1] == "1":
-                        x, y = 3, 2
-                    else:
-                        x, y = 4, 0
-                case "N":
-                    if key[1] == "1":
-                        x, y = 4, 1
-                    else:
-                        x, y = 4, 2
-                case "S":
-                    if key[1] == "1":
-                        x, y = 5, 0
-                    else:
-                        x, y = 5, 1
-                case "G":
-                    if key[1] == "1":
-                        x, y = 5, 2
-                    else:
-                        x, y = 6, 0
-            y += d
+        def __get_position_in_dropmenu(color: COLOR, slot):
+            x, y = divmod(slot, DROP_MENU_COLUMNS)
             if color == COLOR.WHITE:
                 return (
                     self.drop_menu_2_pos[0] + y * self.square_size,
@@ -437,56 +475,12 @@ class Handler(AbstractHandler):
                 col = math.floor((x - self.drop_menu_1_pos[0]) / self.square_size)
                 row = math.floor((y - self.drop_menu_1_pos[1]) / self.square_size)
 
-            key = ""
-            match (row, col):
-                case (0, 0) | (0, 3):
-                    key = "P0"
-                case (0, 1) | (0, 4):
-                    key = "P1"
-                case (0, 2) | (0, 5):
-                    key = "P2"
-                case (1, 0) | (1, 3):
-                    key = "P3"
-                case (1, 1) | (1, 4):
-                    key = "P4"
-                case (1, 2) | (1, 5):
-                    key = "P5"
-                case (2, 0) | (2, 3):
-                    key = "P6"
-                case (2, 1) | (2, 4):
-                    key = "P7"
-                case (2, 2) | (2, 5):
-                    key = "P8"
-                case (3, 0) | (3, 3):
-                    key = "R"
-                case (3, 1) | (3, 4):
-                    key = "B"
-                case (3, 2) | (3, 5):
-                    key = "L1"
-                case (4, 0) | (4, 3):
-                    key = "L2"
-                case (4, 1) | (4, 4):
-                    key = "N1"
-                case (4, 2) | (4, 5):
-                    key = "N2"
-                case (5, 0) | (5, 3):
-                    key = "S1"
-                case (5, 1) | (5, 4):
-                    key = "S2"
-                case (5, 2) | (5, 5):
-                    key = "G1"
-                case (6, 0) | (6, 3):
-                    key = "G2"
-
-            if col >= 3:
-                key += str(color.value)
-            else:
-                key += str(color.opposite().value)
-
-            if key in self.board.captured[color.value]:
-                return key, self.board.captured[color.value][key]
+            slot = row * DROP_MENU_COLUMNS + col
+            for kind, count in enumerate(self.board.hand(color)):
+                if HAND_SLOTS[kind] <= slot < HAND_SLOTS[kind] + count:
+                    return slot, self.board.hand_piece(color, kind)
 
-            return key, None
+            return slot, None
 
         def __in_dropmenu(color: COLOR, x, y):
             if color == COLOR.BLACK:
@@ -508,6 +502,8 @@ class Handler(AbstractHandler):
                 <= self.drop_menu_2_pos[1] + 7 * self.square_size
             )
 
+        self.__poll_bot()
+
         if draw:
             r = self.renderer
 
@@ -581,6 +577,14 @@ class Handler(AbstractHandler):
                             piece.name, piece.color, __get_position_on_board(row, col)
                         )
 
+            if self.bot_search is not None:
+                r.draw_thinking_text(
+                    (
+                        self.board_pos[0] + 3 * self.square_size,
+                        self.board_pos[1] - 1.15 * r.thinking_text.get_size()[1],
+                    )
+                )
+
             # If ended draw end text
             if self.ended:
                 r.draw_end_text(
@@ -601,21 +605,26 @@ class Handler(AbstractHandler):
             elif self.drop_menu_enabled_1:
                 r.draw_drop_menu(self.drop_menu_1_pos, COLOR.BLACK)
 
-                for key, piece in self.board.captured[COLOR.BLACK.value].items():
-                    pos = __get_position_in_dropmenu(COLOR.BLACK, key)
-                    r.draw_piece(piece.name, COLOR.BLACK, pos)
+                for kind, count in enumerate(self.board.hand(COLOR.BLACK)):
+                    piece = self.board.hand_piece(COLOR.BLACK, kind)
+                    for slot in range(HAND_SLOTS[kind], HAND_SLOTS[kind] + count):
+                        pos = __get_position_in_dropmenu(COLOR.BLACK, slot)
+                        r.draw_piece(piece.name, COLOR.BLACK, pos)
 
             elif self.drop_menu_enabled_2:
                 r.draw_drop_menu(self.drop_menu_2_pos, COLOR.WHITE)
 
-                for key, piece in self.board.captured[COLOR.WHITE.value].items():
-                    pos = __get_position_in_dropmenu(COLOR.WHITE, key)
-                    r.draw_piece(piece.name, COLOR.WHITE, pos)
+                for kind, count in enumerate(self.board.hand(COLOR.WHITE)):
+                    piece = self.board.hand_piece(COLOR.WHITE, kind)
+                    for slot in range(HAND_SLOTS[kind], HAND_SLOTS[kind] + count):
+                        pos = __get_position_in_dropmenu(COLOR.WHITE, slot)
+                        r.draw_piece(piece.name, COLOR.WHITE, pos)
 
         elif event.type == pygame.MOUSEBUTTONDOWN:
             # Check if the piece is clicked
             if (
                 not self.ended
+                and self.bot_search is None
                 and not self.drop_menu_enabled_1
                 and not self.drop_menu_enabled_2
                 and __in_board(event.pos[0], event.pos[1])
@@ -661,17 +670,18 @@ class Handler(AbstractHandler):
             # Drop menu logic
             elif (
                 not self.ended
+                and self.bot_search is None
                 and self.drop_menu_enabled_1
                 and __in_dropmenu(COLOR.BLACK, event.pos[0], event.pos[1])
             ):
-                key, piece = __get_piece_from_dropmenu(
+                slot, piece = __get_piece_from_dropmenu(
                     COLOR.BLACK, event.pos[0], event.pos[1]
                 )
                 if piece != None:
                     # Piece in hand
                     self.dragging = True
                     self.active_piece = piece
-                    self.active_pos = __get_position_in_dropmenu(COLOR.BLACK, key)
+                    self.active_pos = __get_position_in_dropmenu(COLOR.BLACK, slot)
                     self.available_squares = self.board.get_available_drops(piece)
                     self.mouse_offset = (
                         self.active_pos[0] - event.pos[0],
@@ -681,17 +691,18 @@ class Handler(AbstractHandler):
             # Drop menu logic
             elif (
                 not self.ended
+                and self.bot_search is None
                 and self.drop_menu_enabled_2
                 and __in_dropmenu(COLOR.WHITE, event.pos[0], event.pos[1])
             ):
-                key, piece = __get_piece_from_dropmenu(
+                slot, piece = __get_piece_from_dropmenu(
                     COLOR.WHITE, event.pos[0], event.pos[1]
                 )
                 if piece != None:
                     # Piece in hand
                     self.dragging = True
                     self.active_piece = piece
-                    self.active_pos = __get_position_in_dropmenu(COLOR.WHITE, key)
+                    self.active_pos = __get_position_in_dropmenu(COLOR.WHITE, slot)
                     self.available_squares = self.board.get_available_drops(piece)
                     self.mouse_offset = (
                         self.active_pos[0] - event.pos[0],
@@ -701,6 +712,7 @@ class Handler(AbstractHandler):
             # Quit button logic
             elif self.quit_button.inbounds((event.pos[0], event.pos[1])):
                 pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
+                self.__cancel_bot()
                 return "Menu"
 
         elif event.type == pygame.MOUSEBUTTONUP and not self.ended:
@@ -728,37 +740,25 @@ class Handler(AbstractHandler):
 
                 # Handle moving a piece on the board
                 else:
+                    new_position = __get_rowcol_on_board(
+                        self.active_pos[0], self.active_pos[1]
+                    )
                     self.board.move(
                         self.active_piece,
-                        __get_rowcol_on_board(self.active_pos[0], self.active_pos[1]),
+                        new_position,
+                        self.active_piece.can_promote(new_position[0]),
                     )
 
-                if self.active_piece.can_promote(self.active_piece.row):
-                    self.active_piece.promote()
-
                 self.active_piece = None
                 self.active_pos = None
                 self.available_squares = None
 
                 self.board.end_turn()
-
-                if self.board.is_checkmate(self.board.turn_color):
-                    self.__end_game()
+                self.__check_end()
 
                 # Handle bot move
                 if not self.ended and not self.board.is_pvp:
-                    _, x, y, piece, dropped, promoted = self.board.bot.best_move(
-                        self.board.turn_color
-                    )
-                    if dropped:
-                        self.board.drop(piece, (x, y))
-                    else:
-                        self.board.move(piece, (x, y))
-
-                    self.board.end_turn()
-
-                    if self.board.is_checkmate(self.board.turn_color):
-                        self.__end_game()
+                    self.__start_bot()
 
             # If incorrect release position stop dragging the piece
             elif self.dragging:
@@ -781,6 +781,7 @@ class Handler(AbstractHandler):
             )
 
             if self.board.clock.get_time(self.board.turn_color) == 0:
+                self.__cancel_bot()
                 self.__end_game()
 
         elif event.type == pygame.MOUSEMOTION:
@@ -831,5 +832,6 @@ class Handler(AbstractHandler):
             self._render_all()
 
         elif event.type == pygame.QUIT:
+            self.__cancel_bot()
             pygame.quit()
             exit()
@@ -29,6 +29,9 @@ class SaveController:
             case "Loss":
                 res = res[1:] + "L " if len(res) >= 10 else res + "L "
 
+            case "Draw":
+                res = res[1:] + "D " if len(res) >= 10 else res + "D "
+
         self.data["Last 10 games"] = res
         self.__save()
 
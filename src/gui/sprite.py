@@ -1,10 +1,68 @@
 import pygame
 import numpy as np
 
+from collections import OrderedDict
+
+# sizes kept rendered by an atlas, the least recently used one is dropped beyond
+CACHED_SIZES = 4
+
+
+class SpriteAtlas:
+    def __init__(self, arrays: dict):
+        """Packs square pixel art of the same size from npy arrays side by side into a
+        single surface, which is scaled in one go to every size asked for.
+
+        Args:
+            arrays (dict): RGBA arrays of shape (n, n, 4) by sprite name, pixels with zero
+            alpha are transparent and the rest opaque
+        """
+
+        self.names = list(arrays)
+        self.n = len(next(iter(arrays.values())))
+        strip = np.concatenate([arrays[name] for name in self.names], axis=1)
+        strip = strip.astype(np.uint8)
+        strip[..., 3] = np.where(strip[..., 3] != 0, 255, 0)
+        self.base = pygame.image.frombuffer(
+            strip.tobytes(), (strip.shape[1], strip.shape[0]), "RGBA"
+        ).copy()
+        self.cache = OrderedDict()
+
+    def render(self, size: int) -> dict:
+        """Returns surfaces of `size` x `size` pixels by sprite name. The art is scaled by a
+        whole number of pixels with nearest neighbour sampling and centered.
+
+        Args:
+            size (int): size
+        """
+
+        size = int(size)
+        if size in self.cache:
+            self.cache.move_to_end(size)
+            return self.cache[size]
+
+        n = self.n
+        scaled = size // n * n
+        padding = (size - scaled) // 2
+        strip = pygame.transform.scale(self.base, (scaled * len(self.names), scaled))
+
+        surfaces = {}
+        for i, name in enumerate(self.names):
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            # sprites smaller than their art stay empty
+            if scaled:
+                surface.blit(strip, (padding, padding), (i * scaled, 0, scaled, scaled))
+            surfaces[name] = surface
+
+        self.cache[size] = surfaces
+        if len(self.cache) > CACHED_SIZES:
+            self.cache.popitem(last=False)
+        return surfaces
+
 
 class Sprite:
     def __init__(self, array: np.array, size: float):
         self.rgb_array: np.array = array
+        self.atlas = SpriteAtlas({None: array})
         self.surface: pygame.Surface = None
         self.size: float = None
 
@@ -17,24 +75,5 @@ class Sprite:
             size (float): size
         """
 
-        n = len(self.rgb_array)
-        pxl_size = size // n
-        padding = (abs((size / n) - pxl_size) * n) / 2
-        surface = pygame.Surface((size, size), pygame.SRCALPHA)
-
-        for row in range(n):
-            for col in range(n):
-                if self.rgb_array[row][col][3] != 0:
-                    pygame.draw.rect(
-                        surface,
-                        self.rgb_array[row][col][:3],
-                        (
-                            padding + col * pxl_size,
-                            padding + row * pxl_size,
-                            pxl_size,
-                            pxl_size,
-                        ),
-                    )
-
-        self.surface = surface
+        self.surface = self.atlas.render(size)[None]
         self.size = size
@@ -0,0 +1,152 @@
+"""Benchmarks the move generator and the search.
+
+Perft counts the leaf nodes of the legal move tree to a fixed depth and checks them
+against known counts, so that a wrong move generator fails loudly. The search bench
+runs `Bot.best_move` to a fixed depth on the same positions and reports nodes per
+second. Results are written as JSON to compare runs. Run from the `src` directory:
+
+    python -m tools.bench --perft-depth 4 --search-depth 3 --output bench.json
+
+The exit status is 1 if a perft count is wrong.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from engine.board import Board
+from engine.bot import Bot
+from engine.pieces import COLOR
+from engine.sfen import parse_sfen, to_sfen
+
+# (name, SFEN or None for the start position, known perft counts from depth 1)
+POSITIONS = (
+    ("start", None, (30, 900, 25470, 719731)),
+    ("drops", "R8/2K1S1SSk/4B4/9/9/9/9/9/1L1L1L3 b RBGSNLP3g3n17p 1", (593,)),
+    (
+        "middlegame",
+        "l6nl/5+P1gk/2np1S3/p1p4Pp/3P2Sp1/1PPb2P1P/P5GS1/R8/LN4bKL w RGgsn5p 1",
+        (207, 28684, 4809015),
+    ),
+)
+
+
+def load(sfen):
+    return Board().core if sfen is None else parse_sfen(sfen)
+
+
+def perft(core, depth):
+    """Returns the number of legal move sequences of `depth` plies from `core`.
+
+    Moves of the last ply are counted without being made.
+    """
+
+    moves = core.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        core.make(move)
+        nodes += perft(core, depth - 1)
+        core.unmake()
+    return nodes
+
+
+def bench_perft(max_depth):
+    """Runs perft on every position up to `max_depth` or its deepest known count.
+
+    Returns:
+        list: one dict per position and depth with the count, the expected count and speed
+    """
+
+    results = []
+    for name, sfen, counts in POSITIONS:
+        core = load(sfen)
+        for depth, expected in enumerate(counts[:max_depth], 1):
+            start = time.monotonic()
+            nodes = perft(core, depth)
+            seconds = time.monotonic() - start
+            results.append(
+                {
+                    "position": name,
+                    "depth": depth,
+                    "nodes": nodes,
+                    "expected": expected,
+                    "ok": nodes == expected,
+                    "seconds": round(seconds, 3),
+                    "nps": round(nodes / seconds) if seconds else None,
+                }
+            )
+    return results
+
+
+def bench_search(depth):
+    """Searches every position to `depth` with a fresh transposition table.
+
+    The opening book and the mate probe are off, so that only the search is measured.
+
+    Returns:
+        list: one dict per position with the score, nodes searched and speed
+    """
+
+    bot = Bot(Board(), book_path=None, mate_probe=False)
+    results = []
+    for name, sfen, _ in POSITIONS:
+        core = load(sfen)
+        bot.tt.clear()
+        start = time.monotonic()
+        result = bot.best_move(
+            COLOR(core.side), depth=depth, time_limit=float("inf"), core=core
+        )
+        seconds = time.monotonic() - start
+        results.append(
+            {
+                "position": name,
+                "sfen": to_sfen(core),
+                "depth": depth,
+                "score": None if result is None else result[0],
+                "nodes": bot.nodes,
+                "seconds": round(seconds, 3),
+                "nps": round(bot.nodes / seconds) if seconds else None,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--perft-depth", type=int, default=3)
+    parser.add_argument("--search-depth", type=int, default=3)
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    args = parser.parse_args()
+
+    perft_results = bench_perft(args.perft_depth)
+    print(f"{'perft':<12} {'depth':>5} {'nodes':>10} {'seconds':>8} {'nps':>9}")
+    for result in perft_results:
+        mark = "" if result["ok"] else f"  expected {result['expected']}"
+        print(
+            f"{result['position']:<12} {result['depth']:>5} {result['nodes']:>10} "
+            f"{result['seconds']:>8} {result['nps'] or '-':>9}{mark}"
+        )
+
+    search_results = bench_search(args.search_depth)
+    print(f"\n{'search':<12} {'depth':>5} {'nodes':>10} {'seconds':>8} {'nps':>9}")
+    for result in search_results:
+        print(
+            f"{result['position']:<12} {result['depth']:>5} {result['nodes']:>10} "
+            f"{result['seconds']:>8} {result['nps'] or '-':>9}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {"perft": perft_results, "search": search_results}, file, indent=2
+            )
+
+    if not all(result["ok"] for result in perft_results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measures how the bot's search scales with the number of worker processes.
+
+Every worker count searches the same middlegame positions to a fixed depth and the
+wall time, node count and speedup over a single worker are reported. Run from the
+`src` directory:
+
+    python -m tools.bench_parallel --depth 4 --workers 1 2 4 8 --json
+"""
+
+import argparse
+import json
+import random
+import time
+
+from engine.board import Board
+from engine.bot import Bot
+
+
+def random_position(seed, plies):
+    """Returns a board after `plies` random legal moves from the start position."""
+
+    board = Board()
+    rng = random.Random(seed)
+    core = board.core
+    for _ in range(plies):
+        legal = core.legal_moves()
+        if not legal:
+            break
+        board.play(rng.choice(legal))
+        board.end_turn()
+    return board
+
+
+def bench(boards, workers, depth):
+    """Searches every board to `depth` with `workers` processes, each with fresh tables.
+
+    The opening book and the mate probe are off, so that only the search is measured.
+
+    Returns:
+        dict: total wall time in seconds and total number of nodes searched in this process
+    """
+
+    elapsed = 0.0
+    nodes = 0
+    for board in boards:
+        bot = Bot(board, workers=workers, book_path=None, mate_probe=False)
+        # started before timing, a new bot's workers have empty tables too
+        if workers > 1:
+            bot.start_pool()
+        start = time.monotonic()
+        bot.best_move(board.turn_color, depth=depth, time_limit=float("inf"))
+        elapsed += time.monotonic() - start
+        nodes += bot.nodes
+        bot.close()
+    return {"workers": workers, "seconds": round(elapsed, 3), "nodes": nodes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--positions", type=int, default=4)
+    parser.add_argument("--plies", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    boards = [random_position(seed, args.plies) for seed in range(args.positions)]
+    results = [bench(boards, workers, args.depth) for workers in args.workers]
+    base = results[0]["seconds"]
+    for result in results:
+        result["speedup"] = round(base / result["seconds"], 2)
+
+    if args.json:
+        print(json.dumps({"depth": args.depth, "results": results}))
+        return
+    print(f"{'workers':>8} {'seconds':>9} {'nodes':>9} {'speedup':>8}")
+    for result in results:
+        print(
+            f"{result['workers']:>8} {result['seconds']:>9} {result['nodes']:>9} "
+            f"{result['speedup']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
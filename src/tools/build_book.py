@@ -0,0 +1,28 @@
+"""Builds the bot's opening book from game records.
+
+Each line of the input holds one game as USI moves from the start position. Run
+from the `src` directory:
+
+    python -m tools.build_book resources/bot/openings.txt
+"""
+
+import argparse
+
+from engine.book import BOOK_PATH, build_book, read_games, save_book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("games", nargs="+", help="files with game records")
+    parser.add_argument("--output", default=BOOK_PATH)
+    parser.add_argument("--max-ply", type=int, default=24)
+    args = parser.parse_args()
+
+    games = [game for path in args.games for game in read_games(path)]
+    records = build_book(games, args.max_ply)
+    save_book(records, args.output)
+    print(f"{len(games)} games, {len(records)} positions and moves -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Plays a match between two bot configurations without the GUI.
+
+Games run in parallel worker processes and every finished game is appended to a
+JSON lines file, so an interrupted match resumes where it stopped when run again
+with the same output. Each opening, a few random moves from the start position,
+is played twice with colors swapped. Run from the `src` directory:
+
+    python -m tools.match --games 40 --workers 4 \\
+        --bot1 '{"name": "deep", "depth": 4}' --bot2 '{"name": "fast", "depth": 2}'
+
+Bot configurations are JSON objects with a "name" and any of "depth", "time" (seconds
+per move), "tt_size_mb", "book", "mate_probe" and "matrix" (path of positional values).
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine.board import REPETITIONS, Board
+from engine.book import BOOK_PATH
+from engine.bot import MATRIX_PATH, Bot
+from engine.moves import to_usi
+from engine.pieces import COLOR
+
+# bots of the current worker process by configuration
+_bots = {}
+
+
+def make_bot(config):
+    key = json.dumps(config, sort_keys=True)
+    if key not in _bots:
+        _bots[key] = Bot(
+            Board(),
+            depth=config.get("depth", 4),
+            tt_size_mb=config.get("tt_size_mb", 16),
+            book_path=BOOK_PATH if config.get("book", False) else None,
+            mate_probe=config.get("mate_probe", True),
+            matrix_path=config.get("matrix", MATRIX_PATH),
+        )
+    return _bots[key]
+
+
+def play_game(index, configs, opening_plies, max_plies, seed):
+    """Plays game `index` of the match.
+
+    Games `2k` and `2k + 1` start from the same random opening, the first bot playing
+    black in even games and white in odd ones.
+
+    Returns:
+        dict: record of the game, "score" is the first bot's result (1, 0.5 or 0)
+    """
+
+    rng = random.Random(seed * 1_000_003 + index // 2)
+    first_black = index % 2 == 0
+    players = list(configs) if first_black else list(reversed(configs))
+    bots = [make_bot(config) for config in players]
+
+    core = Board().core
+    moves = []
+    for _ in range(opening_plies):
+        legal = core.legal_moves()
+        if not legal:
+            break
+        moves.append(rng.choice(legal))
+        core.make(moves[-1])
+    opening = len(moves)
+
+    winner = None
+    reason = "max plies"
+    for bot in bots:
+        bot.tt.clear()
+
+    while len(moves) < max_plies:
+        side = core.side
+        config = players[side]
+        time_limit = config.get("time") or float("inf")
+        result = bots[side].best_move(COLOR(side), time_limit=time_limit, core=core)
+        if result is None:
+            winner = side ^ 1
+            reason = "mate"
+            break
+        core.make(result[1])
+        moves.append(result[1])
+
+        if core.repetitions() >= REPETITIONS - 1:
+            # sennichite is a draw unless one side checked perpetually
+            loser = core.perpetual_check()
+            if loser is not None:
+                winner = loser ^ 1
+                reason = "perpetual check"
+            else:
+                reason = "repetition"
+            break
+
+    if winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if (winner == 0) == first_black else 0.0
+    return {
+        "game": index,
+        "black": players[0]["name"],
+        "white": players[1]["name"],
+        "winner": None if winner is None else ("black", "white")[winner],
+        "reason": reason,
+        "score": score,
+        "plies": len(moves),
+        "opening": opening,
+        "moves": [to_usi(move) for move in moves],
+    }
+
+
+def elo(scores):
+    """Returns Elo difference of the first bot and its 95% error margin.
+
+    Args:
+        scores (list): first bot's result of every game, 1 for a win, 0.5 for a draw
+
+    Returns:
+        tuple: (difference, margin), infinite if one side scored everything
+    """
+
+    n = len(scores)
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / n)
+    margin = 1.96 * deviation / math.sqrt(n)
+
+    def to_elo(p):
+        if p <= 0:
+            return -math.inf
+        if p >= 1:
+            return math.inf
+        return -400 * math.log10(1 / p - 1)
+
+    difference = to_elo(mean)
+    return difference, (to_elo(mean + margin) - to_elo(mean - margin)) / 2
+
+
+def read_results(path):
+    results = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    results[record["game"]] = record
+    return results
+
+
+def summary(results, configs):
+    scores = [record["score"] for record in results.values()]
+    wins = scores.count(1.0)
+    draws = scores.count(0.5)
+    losses = scores.count(0.0)
+    difference, margin = elo(scores)
+    return (
+        f"{configs[0]['name']} vs {configs[1]['name']}: +{wins} ={draws} -{losses} "
+        f"({len(scores)} games), Elo {difference:+.0f} +/- {margin:.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bot1", type=json.loads, default={"name": "bot1"})
+    parser.add_argument("--bot2", type=json.loads, default={"name": "bot2"})
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--opening-plies", type=int, default=6)
+    parser.add_argument("--max-plies", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="match.jsonl")
+    args = parser.parse_args()
+
+    configs = (args.bot1, args.bot2)
+    for number, config in enumerate(configs, 1):
+        config.setdefault("name", f"bot{number}")
+
+    results = read_results(args.output)
+    pending = [index for index in range(args.games) if index not in results]
+    if results:
+        print(f"resuming, {len(results)} games already played")
+
+    with ProcessPoolExecutor(args.workers) as pool, open(args.output, "a") as output:
+        futures = [
+            pool.submit(
+                play_game,
+                index,
+                configs,
+                args.opening_plies,
+                args.max_plies,
+                args.seed,
+            )
+            for index in pending
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            results[record["game"]] = record
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            print(
+                f"game {record['game']}: {record['black']} - {record['white']} "
+                f"{record['winner'] or 'draw'} ({record['reason']}, {record['plies']} plies)"
+            )
+
+    if results:
+        print(summary(results, configs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Solves mate problems with the tsume solver and reports the solve rate.
+
+Problems are read from files with one position in SFEN per line, optionally
+followed by the length of the shortest known mate, or given with --sfen. Run
+from the `src` directory:
+
+    python -m tools.solve_tsume resources/bot/tsume.txt --nodes 100000
+"""
+
+import argparse
+import json
+import time
+
+from engine.moves import to_usi
+from engine.sfen import parse_sfen
+from engine.tsume import TsumeSolver
+
+
+def read_problems(path):
+    """Returns list of (sfen, mate length or None) pairs read from `path`."""
+
+    problems = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if fields and not fields[0].startswith("#"):
+                length = int(fields[4]) if len(fields) > 4 else None
+                problems.append((" ".join(fields[:4]), length))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="files with problems")
+    parser.add_argument("--sfen", action="append", default=[], help="single problem")
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--time", type=float, default=None, help="seconds per problem")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    problems = [(sfen, None) for sfen in args.sfen]
+    for path in args.files:
+        problems += read_problems(path)
+
+    solver = TsumeSolver(max_nodes=args.nodes, time_limit=args.time)
+    results = []
+    for sfen, length in problems:
+        start = time.monotonic()
+        mate = solver.solve(parse_sfen(sfen, problem=True))
+        results.append(
+            {
+                "sfen": sfen,
+                "expected": length,
+                "solved": mate is not None,
+                "length": None if mate is None else len(mate),
+                "mate": None if mate is None else [to_usi(move) for move in mate],
+                "nodes": solver.nodes,
+                "seconds": round(time.monotonic() - start, 3),
+            }
+        )
+
+    solved = sum(result["solved"] for result in results)
+    known = [result for result in results if result["expected"] is not None]
+    shortest = sum(result["length"] == result["expected"] for result in known)
+    if args.json:
+        summary = {"solved": solved, "shortest": shortest, "total": len(results)}
+        print(json.dumps({**summary, "results": results}))
+        return
+    for result in results:
+        mate = " ".join(result["mate"]) if result["solved"] else "not solved"
+        print(
+            f"{result['sfen']:<50} {result['nodes']:>7} {result['seconds']:>7}  {mate}"
+        )
+    print(
+        f"solved {solved}/{len(results)}, shortest known mate {shortest}/{len(known)}"
+    )
+
+
+if __name__ == "__main__":
+    main()